@@ -0,0 +1,234 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import sqlite3
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import psutil
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BENCH_SIZES = [10000, 100000, 1000000]
+BENCH_THRESHOLD = float(os.getenv('BENCH_THRESHOLD', '0.25'))  # Allowed throughput drop / memory growth vs baseline
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'reports', 'benchmarks')
+BENCH_RESULTS_PATH = os.path.join(BENCH_DIR, 'latest.json')
+BENCH_BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+RSS_SAMPLE_INTERVAL = 0.01  # Seconds between resident memory samples while a stage runs
+
+BANKS = ['Commercial Bank of Ethiopia', 'Bank of Abyssinia', 'Dashen Bank']
+
+VOCABULARY = [
+    'app', 'bank', 'transfer', 'money', 'login', 'password', 'slow', 'crash',
+    'update', 'good', 'bad', 'best', 'worst', 'service', 'cannot', 'wanna',
+    'otp', 'failed', 'balance', 'account', 'the', 'is', 'not', 'very', 'it',
+    'works', "doesn't", 'please', 'fix', 'this', 'Thanks!', 'CBE', '2024',
+]
+
+# Play Store ratings cluster at the extremes; complaints run longer than praise
+RATING_WEIGHTS = {1: 0.22, 2: 0.06, 3: 0.08, 4: 0.12, 5: 0.52}
+MEAN_WORDS_BY_RATING = {1: 20, 2: 18, 3: 14, 4: 10, 5: 7}
+
+def generate_reviews(n_rows, seed=42):
+    """Generate a seeded synthetic review frame with a skewed length distribution"""
+    rng = random.Random(seed)
+    ratings = rng.choices(list(RATING_WEIGHTS), weights=list(RATING_WEIGHTS.values()), k=n_rows)
+    rows = []
+    for rating in ratings:
+        # Most reviews are a few words, a long tail runs to a couple hundred
+        length = min(int(rng.expovariate(1 / MEAN_WORDS_BY_RATING[rating])) + 1, 250)
+        words = [rng.choice(VOCABULARY) for _ in range(length)]
+        rows.append({
+            'review': ' '.join(words).capitalize() + rng.choice(['', '.', '!!', ' :)']),
+            'rating': rating,
+            'date': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'bank': rng.choice(BANKS),
+            'source': 'Google Play'
+        })
+    return pd.DataFrame(rows)
+
+def build_tiny_model(path, seed=0):
+    """Save a randomly initialised two-layer DistilBERT classifier, a local stand-in for the sentiment model"""
+    import torch
+    from transformers import DistilBertConfig, DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+    words = sorted({word.lower().strip('.!') for word in VOCABULARY})
+    with open(os.path.join(path, 'vocab.txt'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]', '.', '!', ':', ')', "'"] + words))
+    DistilBertTokenizerFast(os.path.join(path, 'vocab.txt')).save_pretrained(path)
+
+    torch.manual_seed(seed)
+    config = DistilBertConfig(vocab_size=len(words) + 10, dim=32, hidden_dim=64, n_layers=2, n_heads=2,
+                              id2label={0: 'NEGATIVE', 1: 'POSITIVE'}, label2id={'NEGATIVE': 0, 'POSITIVE': 1})
+    DistilBertForSequenceClassification(config).save_pretrained(path)
+    return path
+
+def sample_peak_rss(run, *args, interval=RSS_SAMPLE_INTERVAL):
+    """
+    Time run(*args) while a thread samples resident memory; returns (seconds, peak RSS MB, RSS MB before).
+    Only the call itself is covered, so data generation and prepare do not count toward the peak.
+    """
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    peak = [rss_before]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            peak[0] = max(peak[0], process.memory_info().rss)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        run(*args)
+    finally:
+        elapsed = time.perf_counter() - start
+        done.set()
+        sampler.join()
+    peak[0] = max(peak[0], process.memory_info().rss)
+    return elapsed, peak[0] / 2**20, rss_before / 2**20
+
+# Stage bodies import their module on first use, so each measurement only pays for its own stage.
+# prepare builds the stage input outside the timed region; run is the timed call.
+
+def prepare_cleaned(df, model_dir):
+    from preprocess_reviews import clean_texts
+    df['cleaned_review'] = clean_texts(df['review'])
+    return df
+
+def run_preprocess(df, model_dir):
+    from preprocess_reviews import preprocess_chunk
+    preprocess_chunk(df)
+
+def run_sentiment(df, model_dir):
+    from sentiment_analysis import TOKEN_BUDGET, analyze_sentiment
+    analyze_sentiment(df, token_budget=TOKEN_BUDGET, model_name=model_dir)
+
+def run_themes(df, model_dir):
+    from thematic_analysis import analyze_themes_normalized
+    analyze_themes_normalized(df)
+
+def run_keywords(df, model_dir):
+    from insights import get_common_keywords
+    get_common_keywords(df['cleaned_review'])
+
+def prepare_insert(df, model_dir):
+    from database_setup import migrate
+    df['cleaned_review'] = df['review'].str.lower()
+    connection = sqlite3.connect(':memory:')
+    migrate(connection)
+    return df, connection
+
+def run_insert(prepared, model_dir):
+    # The loader's path: short synthetic reviews repeat, and duplicates are dropped by hash before insert_reviews
+    from data_insertion import insert_new_reviews
+    df, connection = prepared
+    insert_new_reviews(connection, df, {bank: bank_id for bank_id, bank in enumerate(BANKS, start=1)})
+    connection.close()
+
+# name -> (prepare, run): clean_text/preprocess_chunk, analyze_sentiment, analyze_themes,
+# insights.get_common_keywords and insert_new_reviews/insert_reviews into SQLite
+STAGES = {
+    'preprocess': (None, run_preprocess),
+    'sentiment': (None, run_sentiment),
+    'themes': (prepare_cleaned, run_themes),
+    'keywords': (prepare_cleaned, run_keywords),
+    'insert': (prepare_insert, run_insert),
+}
+
+def measure_stage(stage, n_rows, model_dir=None, seed=42):
+    """Time one stage on n_rows synthetic reviews in its own process, sampling its peak RSS while it runs"""
+    prepare, run = STAGES[stage]
+    data = generate_reviews(n_rows, seed)
+    if prepare:
+        data = prepare(data, model_dir)
+
+    elapsed, peak, rss_before = sample_peak_rss(run, data, model_dir)
+    return {
+        'rows': n_rows,
+        'seconds': elapsed,
+        'rows_per_sec': n_rows / elapsed if elapsed else 0.0,
+        'peak_rss_mb': peak,
+        'stage_rss_mb': max(peak - rss_before, 0.0)
+    }
+
+def run_suite(stages=tuple(STAGES), sizes=tuple(BENCH_SIZES), model_dir=None):
+    """Return {stage: {rows: stats}}, each measurement in a fresh spawned process"""
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for stage in stages:
+        for n_rows in sizes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                stats = executor.submit(measure_stage, stage, n_rows, model_dir).result()
+            results.setdefault(stage, {})[str(n_rows)] = stats
+            logger.info(f"{stage} @ {n_rows:,} rows: {stats['rows_per_sec']:,.0f} rows/sec, "
+                        f"stage peak RSS {stats['peak_rss_mb']:,.0f} MB (+{stats['stage_rss_mb']:,.0f} MB over its input)")
+    return results
+
+def find_regressions(results, baseline, threshold=BENCH_THRESHOLD):
+    """Stage/size pairs slower, or with a larger peak RSS while running, than the baseline by more than threshold"""
+    regressions = []
+    for stage, by_size in results.items():
+        for n_rows, stats in by_size.items():
+            base = baseline.get(stage, {}).get(n_rows)
+            if not base:
+                continue
+            if stats['rows_per_sec'] < base['rows_per_sec'] * (1 - threshold):
+                regressions.append(f"{stage} @ {n_rows} rows: {stats['rows_per_sec']:,.0f} rows/sec "
+                                   f"vs baseline {base['rows_per_sec']:,.0f}")
+            if stats['peak_rss_mb'] > base['peak_rss_mb'] * (1 + threshold):
+                regressions.append(f"{stage} @ {n_rows} rows: stage peak RSS {stats['peak_rss_mb']:,.0f} MB "
+                                   f"vs baseline {base['peak_rss_mb']:,.0f} MB")
+    return regressions
+
+def write_json(data, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+def main():
+    # --stages=preprocess,insert and --sizes=10000,100000 narrow the run;
+    # --save-baseline records this run as the baseline later runs are checked against
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    stages = [name for name in options.get('stages', ','.join(STAGES)).split(',') if name]
+    sizes = [int(size) for size in options.get('sizes', ','.join(map(str, BENCH_SIZES))).split(',') if size]
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        logger.error(f"Unknown stages: {', '.join(unknown)} (expected {', '.join(STAGES)})")
+        return 2
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        if 'sentiment' in stages:
+            build_tiny_model(model_dir)
+        results = run_suite(stages, sizes, model_dir)
+
+    write_json(results, options.get('output', BENCH_RESULTS_PATH))
+    baseline_path = options.get('baseline', BENCH_BASELINE_PATH)
+    if '--save-baseline' in sys.argv:
+        write_json(results, baseline_path)
+        logger.info(f"Saved baseline to {baseline_path}")
+        return 0
+    if not os.path.exists(baseline_path):
+        logger.info(f"No baseline at {baseline_path}; run with --save-baseline to record one")
+        return 0
+
+    with open(baseline_path, encoding='utf-8') as f:
+        regressions = find_regressions(results, json.load(f))
+    for message in regressions:
+        logger.error(f"Regression: {message}")
+    if regressions:
+        return 1
+    logger.info(f"No stage regressed more than {BENCH_THRESHOLD:.0%} against {baseline_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
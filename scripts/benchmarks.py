@@ -0,0 +1,465 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmark_suite import BANKS, VOCABULARY, generate_reviews
+from dataset_io import CLEAN_PATH, csv_path_for, read_dataset, write_dataset
+from preprocess_reviews import clean_text, clean_texts
+from data_insertion import build_analysis_rows, compute_review_hashes, insert_reviews, load_analysis, parallel_load
+from database import SQLitePool, set_pool
+from report_queries import QueryCache, bank_sentiment, rating_sentiment
+from database_setup import migrate
+from sentiment_analysis import MODEL_NAME, TOKEN_BUDGET, analyze_sentiment
+from scrape_reviews import ReviewSink, scrape_apps
+from insights import get_common_keywords, summarize_banks
+from thematic_analysis import THEMES_CONFIG, ThemeMatcher, extract_keywords, extract_keywords_batch
+from token_store import TokenStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def time_call(func, *args, **kwargs):
+    """Return (result, elapsed seconds) for a single call"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def bench_clean_text(n_rows=10000):
+    """Compare the per-row and batch cleaners and check that they agree"""
+    df = generate_reviews(n_rows)
+    reviews = df['review'].copy()
+    reviews.iloc[::97] = None  # Non-string rows must come back empty
+
+    expected, row_time = time_call(reviews.apply, clean_text)
+    actual, batch_time = time_call(clean_texts, reviews)
+
+    mismatches = int((expected != actual).sum())
+    if mismatches:
+        raise AssertionError(f"clean_texts differs from clean_text on {mismatches} rows")
+
+    logger.info(f"clean_text:  {n_rows / row_time:,.0f} rows/sec")
+    logger.info(f"clean_texts: {n_rows / batch_time:,.0f} rows/sec ({row_time / batch_time:.1f}x)")
+    return {'rows': n_rows, 'row_rows_per_sec': n_rows / row_time, 'batch_rows_per_sec': n_rows / batch_time}
+
+def bench_insert_reviews(n_rows=10000, batch_size=1000):
+    """Time the batched review loader against an in-memory SQLite database with the full schema"""
+    df = generate_reviews(n_rows)
+    df['cleaned_review'] = df['review'].str.lower()
+    bank_id_map = {bank: bank_id for bank_id, bank in enumerate(BANKS, start=1)}
+
+    connection = sqlite3.connect(':memory:')
+    migrate(connection)
+    inserted, elapsed = time_call(insert_reviews, connection, df, bank_id_map, batch_size=batch_size)
+    connection.close()
+
+    if inserted != n_rows:
+        raise AssertionError(f"Expected {n_rows} inserted rows, got {inserted}")
+
+    logger.info(f"insert_reviews: {n_rows / elapsed:,.0f} rows/sec (batch_size={batch_size})")
+    return {'rows': n_rows, 'rows_per_sec': n_rows / elapsed}
+
+def bench_sentiment_batching(n_rows=2000, model_name=MODEL_NAME, token_budget=TOKEN_BUDGET):
+    """Compare fixed-size batches with length-bucketed batches on the same reviews"""
+    df = generate_reviews(n_rows)
+
+    fixed, fixed_time = time_call(analyze_sentiment, df.copy(), model_name=model_name)
+    bucketed, bucketed_time = time_call(analyze_sentiment, df.copy(), token_budget=token_budget, model_name=model_name)
+
+    mismatches = int((fixed['sentiment'] != bucketed['sentiment']).sum())
+    if mismatches:
+        raise AssertionError(f"Bucketed batching changed {mismatches} sentiment labels")
+
+    logger.info(f"analyze_sentiment (fixed):    {n_rows / fixed_time:,.0f} rows/sec")
+    logger.info(f"analyze_sentiment (bucketed): {n_rows / bucketed_time:,.0f} rows/sec ({fixed_time / bucketed_time:.1f}x)")
+    return {'rows': n_rows, 'fixed_rows_per_sec': n_rows / fixed_time, 'bucketed_rows_per_sec': n_rows / bucketed_time}
+
+def bench_sentiment_workers(n_rows=2000, workers=2, model_name=MODEL_NAME, token_budget=TOKEN_BUDGET):
+    """Compare single-process and multi-process inference on the same reviews"""
+    df = generate_reviews(n_rows)
+
+    single, single_time = time_call(analyze_sentiment, df.copy(), token_budget=token_budget, model_name=model_name)
+    sharded, sharded_time = time_call(analyze_sentiment, df.copy(), token_budget=token_budget,
+                                      model_name=model_name, workers=workers)
+
+    mismatches = int((single['sentiment'] != sharded['sentiment']).sum())
+    if mismatches:
+        raise AssertionError(f"Multi-process inference changed {mismatches} sentiment labels")
+
+    logger.info(f"analyze_sentiment (1 process):  {n_rows / single_time:,.0f} rows/sec")
+    logger.info(f"analyze_sentiment ({workers} workers):  {n_rows / sharded_time:,.0f} rows/sec")
+    return {'rows': n_rows, 'workers': workers, 'single_rows_per_sec': n_rows / single_time,
+            'sharded_rows_per_sec': n_rows / sharded_time}
+
+def load_review_sample(n_rows, data_path=CLEAN_PATH):
+    """Sample our own cleaned reviews when available, else synthetic ones"""
+    if os.path.isfile(data_path) or os.path.isfile(csv_path_for(data_path)):
+        df = read_dataset(data_path)
+        df['review'] = df['review'].fillna('')
+        return df.sample(n=min(n_rows, len(df)), random_state=42).reset_index(drop=True)
+    logger.info(f"{data_path} not found, using synthetic reviews")
+    return generate_reviews(n_rows)
+
+def bench_sentiment_backends(n_rows=2000, backends=('int8', 'onnx'), model_name=MODEL_NAME,
+                             token_budget=TOKEN_BUDGET, data_path=CLEAN_PATH):
+    """Parity and throughput of quantized/ONNX backends against the fp32 torch model"""
+    df = load_review_sample(n_rows, data_path)
+    reference, reference_time = time_call(analyze_sentiment, df.copy(), token_budget=token_budget,
+                                          model_name=model_name)
+    report = [{'backend': 'torch', 'label_agreement': 1.0, 'mean_score_drift': 0.0,
+               'max_score_drift': 0.0, 'rows_per_sec': len(df) / reference_time}]
+
+    for backend in backends:
+        try:
+            result, elapsed = time_call(analyze_sentiment, df.copy(), token_budget=token_budget,
+                                        model_name=model_name, backend=backend)
+        except ImportError as e:
+            logger.warning(f"Skipping {backend} backend: {e}")
+            continue
+        drift = (result['sentiment_score'] - reference['sentiment_score']).abs()
+        report.append({
+            'backend': backend,
+            'label_agreement': float((result['sentiment'] == reference['sentiment']).mean()),
+            'mean_score_drift': float(drift.mean()),
+            'max_score_drift': float(drift.max()),
+            'rows_per_sec': len(df) / elapsed
+        })
+
+    report = pd.DataFrame(report)
+    report['speedup'] = report['rows_per_sec'] / report['rows_per_sec'].iloc[0]
+    logger.info(f"Sentiment backend parity report:\n{report.to_string(index=False)}")
+    return report
+
+def bench_extract_keywords(n_rows=5000, batch_size=1000, n_process=1):
+    """Compare per-row extract_keywords with the nlp.pipe batch extractor"""
+    texts = clean_texts(generate_reviews(n_rows)['review']).tolist()
+
+    expected, row_time = time_call(lambda: [extract_keywords(text) for text in texts])
+    actual, batch_time = time_call(
+        lambda: [keywords for _, keywords in
+                 extract_keywords_batch(enumerate(texts), batch_size=batch_size, n_process=n_process)]
+    )
+
+    mismatches = sum(1 for left, right in zip(expected, actual) if left != right)
+    if mismatches or len(expected) != len(actual):
+        raise AssertionError(f"extract_keywords_batch differs from extract_keywords on {mismatches} rows")
+
+    logger.info(f"extract_keywords:       {n_rows / row_time:,.0f} rows/sec")
+    logger.info(f"extract_keywords_batch: {n_rows / batch_time:,.0f} rows/sec ({row_time / batch_time:.1f}x)")
+    return {'rows': n_rows, 'row_rows_per_sec': n_rows / row_time, 'batch_rows_per_sec': n_rows / batch_time}
+
+def bench_theme_matcher(n_rows=5000, config_path=THEMES_CONFIG):
+    """Compare the per-theme list scan with the compiled ThemeMatcher on extracted keywords"""
+    texts = clean_texts(generate_reviews(n_rows)['review']).tolist()
+    keyword_rows = [keywords for _, keywords in extract_keywords_batch(enumerate(texts))]
+    with open(config_path, encoding='utf-8') as f:
+        theme_mapping = json.load(f)
+
+    def scan(rows):
+        return [
+            {theme for theme, keywords_list in theme_mapping.items()
+             if any(word in keywords_list for word in keywords)} or {'Other'}
+            for keywords in rows
+        ]
+
+    matcher = ThemeMatcher(theme_mapping)
+    expected, scan_time = time_call(scan, keyword_rows)
+    actual, match_time = time_call(lambda: [set(matcher.match(keywords) or ['Other']) for keywords in keyword_rows])
+
+    mismatches = sum(1 for left, right in zip(expected, actual) if left != right)
+    if mismatches:
+        raise AssertionError(f"ThemeMatcher differs from the theme_mapping scan on {mismatches} rows")
+
+    logger.info(f"theme_mapping scan: {n_rows / scan_time:,.0f} rows/sec")
+    logger.info(f"ThemeMatcher:       {n_rows / match_time:,.0f} rows/sec ({scan_time / match_time:.1f}x)")
+    logger.info(f"Theme match counts: {matcher.match_counts()}")
+    return {'rows': n_rows, 'scan_rows_per_sec': n_rows / scan_time, 'matcher_rows_per_sec': n_rows / match_time}
+
+def bench_token_store(n_rows=5000):
+    """Time a cold token store build against a warm reload and check keywords match the extractor"""
+    texts = clean_texts(generate_reviews(n_rows)['review']).tolist()
+    expected = [keywords for _, keywords in extract_keywords_batch(enumerate(texts))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = os.path.join(tmp, 'token_store')
+        cold = TokenStore(store_path)
+        actual, cold_time = time_call(cold.lookup, texts)
+        cold.save()
+        warm, warm_time = time_call(lambda: TokenStore(store_path).lookup(texts))
+
+    for rows in (actual, warm):
+        mismatches = sum(1 for keywords, stored in zip(expected, rows) if keywords != stored)
+        if mismatches:
+            raise AssertionError(f"TokenStore keywords differ from extract_keywords_batch on {mismatches} rows")
+
+    logger.info(f"TokenStore cold: {n_rows / cold_time:,.0f} rows/sec")
+    logger.info(f"TokenStore warm: {n_rows / warm_time:,.0f} rows/sec ({cold_time / warm_time:.1f}x)")
+    return {'rows': n_rows, 'cold_rows_per_sec': n_rows / cold_time, 'warm_rows_per_sec': n_rows / warm_time}
+
+def bench_bank_keywords(n_rows=20000, top_n=10):
+    """Compare per-bank keyword counting with the single-pass summarize_banks"""
+    df = generate_reviews(n_rows)
+    df['cleaned_review'] = clean_texts(df['review'])
+
+    def per_bank():
+        results = {}
+        for bank in BANKS:
+            bank_df = df[df['bank'].str.lower() == bank.lower()]
+            results[bank] = (get_common_keywords(bank_df[bank_df['rating'] >= 4]['cleaned_review'], top_n),
+                             get_common_keywords(bank_df[bank_df['rating'] <= 2]['cleaned_review'], top_n))
+        return results
+
+    expected, per_bank_time = time_call(per_bank)
+    summaries, single_pass_time = time_call(summarize_banks, df, BANKS, top_n)
+
+    mismatches = [bank for bank in BANKS
+                  if expected[bank] != (summaries[bank]['positive'], summaries[bank]['negative'])]
+    if mismatches:
+        raise AssertionError(f"summarize_banks differs from get_common_keywords for {mismatches}")
+
+    logger.info(f"get_common_keywords per bank: {n_rows / per_bank_time:,.0f} rows/sec")
+    logger.info(f"summarize_banks:              {n_rows / single_pass_time:,.0f} rows/sec "
+                f"({per_bank_time / single_pass_time:.1f}x)")
+    return {'rows': n_rows, 'per_bank_rows_per_sec': n_rows / per_bank_time,
+            'single_pass_rows_per_sec': n_rows / single_pass_time}
+
+def stub_reviews(app_id, lang='en', country='et', sort=None, count=200, continuation_token=None,
+                 latency=0.05, total=400):
+    """Offline stand-in for google_play_scraper.reviews: newest-first pages and an offset token"""
+    time.sleep(latency)
+    rng = random.Random(app_id)
+    listing = [{
+        'reviewId': f"{app_id}-{total - i}",
+        'content': ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(1, 30))),
+        'score': rng.randint(1, 5),
+        'at': f"2024-{12 - i * 12 // total:02d}-01 00:00:00"
+    } for i in range(total)]
+    start = continuation_token or 0
+    end = start + count
+    return listing[start:end], (end if end < total else None)
+
+def bench_scraper(n_apps=24, concurrency=8, rate=50.0):
+    """Compare one-at-a-time scraping with the concurrent scraper against the offline stub"""
+    apps = {f"Bank {i}": f"com.example.bank{i}" for i in range(n_apps)}
+
+    serial_sink, concurrent_sink = ReviewSink(), ReviewSink()
+    _, serial_time = time_call(scrape_apps, apps, concurrency=1, rate=rate, fetch=stub_reviews, sink=serial_sink)
+    _, concurrent_time = time_call(scrape_apps, apps, concurrency=concurrency, rate=rate, fetch=stub_reviews,
+                                   sink=concurrent_sink)
+
+    # Pages from different apps interleave in the concurrent sink, so compare per bank
+    def by_bank(rows):
+        return {bank: [row for row in rows if row['bank'] == bank] for bank in apps}
+
+    if by_bank(serial_sink.rows) != by_bank(concurrent_sink.rows):
+        raise AssertionError("Concurrent scraper results differ from the one-at-a-time run")
+
+    logger.info(f"scrape_apps serial:     {n_apps / serial_time:,.1f} apps/sec")
+    logger.info(f"scrape_apps concurrent: {n_apps / concurrent_time:,.1f} apps/sec ({serial_time / concurrent_time:.1f}x)")
+    return {'apps': n_apps, 'serial_apps_per_sec': n_apps / serial_time,
+            'concurrent_apps_per_sec': n_apps / concurrent_time}
+
+def bench_dataset_io(n_rows=200000):
+    """Compare a CSV round trip with the typed Parquet dataset, reading all and projected columns"""
+    df = generate_reviews(n_rows)
+    df['cleaned_review'] = clean_texts(df['review'])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'reviews.parquet')
+        _, csv_write_time = time_call(df.to_csv, csv_path_for(path), index=False)
+        _, parquet_write_time = time_call(write_dataset, df, path)
+        from_csv, csv_read_time = time_call(pd.read_csv, csv_path_for(path))
+        from_parquet, parquet_read_time = time_call(read_dataset, path)
+        _, projected_time = time_call(read_dataset, path, columns=['bank', 'rating'])
+        csv_bytes, parquet_bytes = os.path.getsize(csv_path_for(path)), os.path.getsize(path)
+
+    if len(from_csv) != len(from_parquet) or (from_csv['rating'].to_numpy() != from_parquet['rating'].to_numpy()).any():
+        raise AssertionError("Parquet round trip differs from the CSV round trip")
+
+    csv_memory = from_csv.memory_usage(deep=True).sum()
+    parquet_memory = from_parquet.memory_usage(deep=True).sum()
+    logger.info(f"write: CSV {csv_write_time:.2f}s, Parquet {parquet_write_time:.2f}s")
+    logger.info(f"read:  CSV {csv_read_time:.2f}s, Parquet {parquet_read_time:.2f}s "
+                f"({csv_read_time / parquet_read_time:.1f}x), bank+rating only {projected_time:.3f}s")
+    logger.info(f"size:  CSV {csv_bytes / 1e6:.1f} MB, Parquet {parquet_bytes / 1e6:.1f} MB; "
+                f"in memory {csv_memory / 1e6:.1f} MB vs {parquet_memory / 1e6:.1f} MB")
+    return {'rows': n_rows, 'csv_read_sec': csv_read_time, 'parquet_read_sec': parquet_read_time,
+            'projected_read_sec': projected_time, 'csv_memory': csv_memory, 'parquet_memory': parquet_memory}
+
+def bench_load_analysis(n_rows=20000, themes_per_review=2):
+    """Compare per-row sentiment/theme writes with the staged set-based loader on SQLite"""
+    rng = random.Random(7)
+    df = generate_reviews(n_rows)
+    df['cleaned_review'] = df['review'].str.lower()
+    df['sentiment'] = [rng.choice(['POSITIVE', 'NEGATIVE', 'NEUTRAL']) for _ in range(n_rows)]
+    df['sentiment_score'] = [rng.random() for _ in range(n_rows)]
+    df = df[~compute_review_hashes(df).duplicated()].reset_index(drop=True)
+    themes = ['Account Access Issues', 'Transaction Performance', 'User Interface & Experience', 'Other']
+    review_themes = pd.DataFrame([(review_id, theme) for review_id in df.index
+                                  for theme in rng.sample(themes, themes_per_review)], columns=['review_id', 'theme'])
+    bank_id_map = {bank: bank_id for bank_id, bank in enumerate(BANKS, start=1)}
+
+    def load_row_by_row(connection):
+        cursor = connection.cursor()
+        hashes = compute_review_hashes(df)
+        for row in build_analysis_rows(df, hashes):
+            cursor.execute("""
+                UPDATE reviews SET sentiment = :sentiment, sentiment_score = :sentiment_score
+                WHERE review_hash = :review_hash
+            """, row)
+        for review_id, theme in review_themes.itertuples(index=False):
+            cursor.execute("INSERT OR IGNORE INTO theme (theme_id, theme_name) "
+                           "SELECT COALESCE(MAX(theme_id), 0) + 1, :theme FROM theme "
+                           "WHERE NOT EXISTS (SELECT 1 FROM theme WHERE theme_name = :theme)", {"theme": theme})
+            cursor.execute("SELECT review_id FROM reviews WHERE review_hash = :review_hash",
+                           {"review_hash": hashes[review_id]})
+            db_review_id = cursor.fetchone()[0]
+            cursor.execute("INSERT INTO review_themes (review_id, theme_id) "
+                           "SELECT :review_id, theme_id FROM theme WHERE theme_name = :theme",
+                           {"review_id": db_review_id, "theme": theme})
+        connection.commit()
+
+    def snapshot(connection):
+        cursor = connection.cursor()
+        cursor.execute("SELECT review_hash, sentiment, sentiment_score FROM reviews ORDER BY review_hash")
+        sentiment = cursor.fetchall()
+        cursor.execute("""
+            SELECT r.review_hash, t.theme_name FROM review_themes rt
+            JOIN reviews r ON r.review_id = rt.review_id JOIN theme t ON t.theme_id = rt.theme_id
+            ORDER BY 1, 2
+        """)
+        return sentiment, cursor.fetchall()
+
+    results = {}
+    timings = {}
+    for name, loader in [('row-by-row', load_row_by_row),
+                         ('staged', lambda connection: load_analysis(connection, df, review_themes=review_themes))]:
+        connection = sqlite3.connect(':memory:')
+        migrate(connection)
+        insert_reviews(connection, df, bank_id_map)
+        _, timings[name] = time_call(loader, connection)
+        results[name] = snapshot(connection)
+        connection.close()
+
+    if results['row-by-row'] != results['staged']:
+        raise AssertionError("Staged loader wrote different sentiment or themes than the row-by-row loader")
+
+    for name, elapsed in timings.items():
+        logger.info(f"load_analysis ({name}): {len(df) / elapsed:,.0f} reviews/sec")
+    return {'rows': len(df), 'row_by_row_sec': timings['row-by-row'], 'staged_sec': timings['staged']}
+
+def bench_parallel_load(n_rows=100000, workers=4, partitions=8, batch_size=1000, commit_size=10000):
+    """Single-session insert against hash-partitioned parallel load into a SQLite file, plus a retry run"""
+    df = generate_reviews(n_rows)
+    df['cleaned_review'] = df['review'].str.lower()
+    bank_id_map = {bank: bank_id for bank_id, bank in enumerate(BANKS, start=1)}
+
+    def count_reviews(connection):
+        return connection.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        serial_path, parallel_path = os.path.join(tmp, 'serial.db'), os.path.join(tmp, 'parallel.db')
+        for path in (serial_path, parallel_path):
+            connection = sqlite3.connect(path)
+            migrate(connection)
+            connection.close()
+
+        connection = sqlite3.connect(serial_path)
+        _, serial_time = time_call(insert_reviews, connection, df, bank_id_map, batch_size=batch_size)
+        expected = count_reviews(connection)
+        connection.close()
+
+        previous = set_pool(SQLitePool(parallel_path, max_size=workers))
+        try:
+            # First run loses its last partition, the retry loads only that one
+            completed = {}
+            (results, _), parallel_time = time_call(
+                parallel_load, df, bank_id_map, workers=workers, by='hash', partitions=partitions,
+                batch_size=batch_size, commit_size=commit_size, on_complete=completed.__setitem__)
+            dropped = sorted(completed)[-1]
+            completed.pop(dropped)
+            retried, failed = parallel_load(df, bank_id_map, workers=workers, by='hash', partitions=partitions,
+                                            batch_size=batch_size, commit_size=commit_size, completed=completed)
+        finally:
+            set_pool(previous).close(force=True)
+
+        connection = sqlite3.connect(parallel_path)
+        loaded = count_reviews(connection)
+        connection.close()
+
+    if loaded != expected or failed or [result['partition'] for result in retried] != [dropped] or retried[0]['inserted']:
+        raise AssertionError(f"Parallel load stored {loaded} reviews (expected {expected}), retry ran {retried}")
+
+    logger.info(f"insert_reviews (1 session):  {n_rows / serial_time:,.0f} rows/sec")
+    logger.info(f"parallel_load ({workers} sessions): {n_rows / parallel_time:,.0f} rows/sec over {len(results)} partitions")
+    return {'rows': n_rows, 'serial_rows_per_sec': n_rows / serial_time, 'parallel_rows_per_sec': n_rows / parallel_time,
+            'partitions': results}
+
+def bench_report_queries(n_rows=200000):
+    """Per-bank and bank x rating sentiment means: pandas over the full corpus vs GROUP BY in SQLite, cold and cached"""
+    rng = random.Random(11)
+    df = generate_reviews(n_rows)
+    df['cleaned_review'] = df['review'].str.lower()
+    df['sentiment'] = [rng.choice(['POSITIVE', 'NEGATIVE', 'NEUTRAL']) for _ in range(n_rows)]
+    df['sentiment_score'] = [rng.random() for _ in range(n_rows)]
+    df = df[~compute_review_hashes(df).duplicated()].reset_index(drop=True)
+
+    connection = sqlite3.connect(':memory:')
+    migrate(connection)
+    bank_id_map = {bank: bank_id for bank_id, bank in enumerate(BANKS, start=1)}
+    connection.executemany("INSERT INTO banks (bank_id, bank_name) VALUES (?, ?)",
+                           [(bank_id, bank) for bank, bank_id in bank_id_map.items()])
+    insert_reviews(connection, df, bank_id_map)
+    load_analysis(connection, df)
+
+    def pandas_aggregates():
+        # What reporting did before: pull every review, then group in memory
+        frame = pd.read_sql_query("""
+            SELECT b.bank_name AS bank, r.rating, r.sentiment FROM reviews r JOIN banks b ON b.bank_id = r.bank_id
+        """, connection)
+        frame['sentiment_numeric'] = frame['sentiment'].map({'POSITIVE': 1, 'NEGATIVE': 0, 'NEUTRAL': 0.5})
+        return (frame.groupby('bank')['sentiment_numeric'].mean().reset_index(),
+                frame.groupby(['bank', 'rating'])['sentiment_numeric'].mean().unstack())
+
+    cache = QueryCache(ttl=60)
+    def sql_aggregates():
+        return bank_sentiment(connection, cache), rating_sentiment(connection, cache)
+
+    (expected_bank, expected_rating), pandas_time = time_call(pandas_aggregates)
+    (bank, rating), sql_time = time_call(sql_aggregates)
+    _, cached_time = time_call(sql_aggregates)
+    connection.close()
+
+    if not (expected_bank['bank'].tolist() == bank['bank'].tolist()
+            and ((expected_bank['sentiment_numeric'] - bank['sentiment_numeric']).abs() < 1e-9).all()
+            and ((expected_rating - rating).abs() < 1e-9).all().all()):
+        raise AssertionError("SQL aggregates differ from the pandas aggregates")
+
+    logger.info(f"sentiment aggregates: pandas {pandas_time * 1000:.0f}ms, SQL {sql_time * 1000:.0f}ms "
+                f"({pandas_time / sql_time:.1f}x), cached {cached_time * 1000:.2f}ms")
+    return {'rows': len(df), 'pandas_sec': pandas_time, 'sql_sec': sql_time, 'cached_sec': cached_time}
+
+def main():
+    bench_clean_text()
+    bench_insert_reviews()
+    bench_sentiment_batching()
+    bench_sentiment_workers()
+    bench_sentiment_backends()
+    bench_extract_keywords()
+    bench_theme_matcher()
+    bench_token_store()
+    bench_bank_keywords()
+    bench_scraper()
+    bench_dataset_io()
+    bench_load_analysis()
+    bench_parallel_load()
+    bench_report_queries()
+
+if __name__ == "__main__":
+    main()
@@ -1,123 +1,621 @@
-import oracledb as cx_Oracle
 import pandas as pd
+import numpy as np
 import logging
 import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataset_io import CLEAN_PATH, SENTIMENT_PATH, THEME_REVIEWS_PATH, THEME_MAP_PATH, csv_path_for, read_dataset
+from report_queries import mark_load_complete
+from database_setup import table_exists
+from database import POOL_MAX, get_connection, release_connection, get_dialect, get_bank_ids, clear_bank_id_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Database connection parameters
-ORACLE_USER = 'demouser'
-ORACLE_PASSWORD = 'demouser'
-ORACLE_DSN = 'localhost:1521/XEPDB1'
+DATA_FILE_PATH = CLEAN_PATH
 
-CSV_FILE_PATH = 'data/bank_reviews_clean.csv'
+# Parallel load (--parallel): one pooled session per worker, each loading whole partitions
+LOAD_WORKERS = int(os.getenv('LOAD_WORKERS', str(POOL_MAX)))
+LOAD_PARTITION_BY = os.getenv('LOAD_PARTITION_BY', 'bank')  # 'bank' or 'hash'
+LOAD_PARTITIONS = int(os.getenv('LOAD_PARTITIONS', '0')) or LOAD_WORKERS  # Buckets when partitioning by hash
+LOAD_BATCH_SIZE = int(os.getenv('LOAD_BATCH_SIZE', '1000'))  # Rows per executemany
+LOAD_COMMIT_SIZE = int(os.getenv('LOAD_COMMIT_SIZE', '10000'))  # Rows per commit within a partition
+LOAD_PROGRESS_PATH = 'data/load_progress.json'  # Partitions finished by an interrupted parallel load
+
+# Session-scoped table holding the keys of the batch being loaded
+STAGE_TABLE = 'review_keys_stage'
+
+# Session-scoped tables holding sentiment/keywords and theme matches before the set-based update
+ANALYSIS_STAGE_TABLE = 'review_analysis_stage'
+THEME_STAGE_TABLE = 'review_theme_stage'
+SENTIMENT_LABELS = ['POSITIVE', 'NEGATIVE', 'NEUTRAL']  # Values allowed by chk_sentiment
+KEYWORDS_MAX_LENGTH = 4000  # reviews.keywords is VARCHAR2(4000) on Oracle
 
 def connect_to_db():
-    try:
-        connection = cx_Oracle.connect(user=ORACLE_USER, password=ORACLE_PASSWORD, dsn=ORACLE_DSN)
-        logger.info("Connected to Oracle database.")
-        return connection
-    except Exception as e:
-        logger.error(f"Failed to connect to the database: {e}")
-        return None
+    return get_connection()
 
 def insert_banks_and_get_ids(connection, df):
-    cursor = connection.cursor()
-    bank_names = df['bank'].dropna().unique()
-    bank_id_map = {}
+    bank_names = df['bank'].dropna().unique().tolist()
 
     try:
-        for bank_name in bank_names:
-            # Check if the bank already exists
-            cursor.execute("SELECT bank_id FROM banks WHERE bank_name = :bank_name", {"bank_name": bank_name})
-            result = cursor.fetchone()
-            if result:
-                bank_id = result[0]
-            else:
-                cursor.execute("""
-                    INSERT INTO banks (bank_name, app_name, play_store_url)
-                    VALUES (:bank_name, :app_name, :url)
-                    RETURNING bank_id INTO :bank_id
-                """, {
-                    "bank_name": bank_name,
-                    "app_name": bank_name,
-                    "url": None,
-                    "bank_id": cursor.var(cx_Oracle.NUMBER)
-                })
-                bank_id = int(cursor.getimplicitresults()[0][0])
-            bank_id_map[bank_name] = bank_id
-
+        bank_id_map = get_bank_ids(connection, bank_names)
         connection.commit()
         logger.info("Banks inserted or found successfully.")
         return bank_id_map
     except Exception as e:
         logger.error(f"Error inserting banks: {e}")
         connection.rollback()
+        clear_bank_id_cache()
         return {}
 
-def insert_reviews(connection, df, bank_id_map):
+def review_insert_sql(dialect):
+    """Build the review INSERT statement for the given dialect"""
+    review_date = "TO_DATE(:review_date, 'YYYY-MM-DD')" if dialect == 'oracle' else ":review_date"
+    return f"""
+        INSERT INTO reviews 
+        (bank_id, review_text, cleaned_review, rating, review_date, source, review_hash)
+        VALUES (:bank_id, :review_text, :cleaned_review, :rating, {review_date}, :source, :review_hash)
+    """
+
+def review_hash(bank, date, text):
+    """Stable key for a review: SHA-256 of bank, date and review text"""
+    parts = ['' if pd.isna(value) else str(value) for value in (bank, date, text)]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+def compute_review_hashes(df):
+    """Review keys for every row of a frame with bank, date and review columns"""
+    columns = [df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+               for name in ('bank', 'date', 'review')]
+    return pd.Series([review_hash(*values) for values in zip(*columns)], index=df.index, dtype=object)
+
+def to_int_rating(value):
+    """Mirror int(value), returning None where it would raise"""
+    try:
+        return int(value)
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+def validate_reviews(df, bank_id_map):
+    """Vectorized bank/rating validation, logging skipped rows like the row-by-row loader"""
+    banks = df['bank'] if 'bank' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    ratings = df['rating'] if 'rating' in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+    known_bank = banks.isin(list(bank_id_map))
+    if pd.api.types.is_numeric_dtype(ratings) and not pd.api.types.is_bool_dtype(ratings):
+        valid_rating = ratings.notna() & np.isfinite(ratings)
+        int_ratings = ratings.where(valid_rating, 0).astype('int64')
+    else:
+        int_ratings = ratings.map(to_int_rating)
+        valid_rating = int_ratings.notna()
+
+    # Report skipped rows in file order, bank checks first as before
+    for position in np.flatnonzero(~(known_bank & valid_rating).to_numpy()):
+        if not known_bank.iloc[position]:
+            logger.warning(f"Skipping row due to unknown bank: {banks.iloc[position]}")
+        else:
+            logger.warning(f"Skipping row due to invalid rating: {ratings.iloc[position]}")
+
+    keep = known_bank & valid_rating
+    return df[keep], int_ratings[keep]
+
+def build_review_rows(df, bank_id_map, ratings):
+    """Turn validated reviews into bind dictionaries for executemany"""
+    def text_column(name, default=None):
+        if name not in df.columns:
+            return [default] * len(df)
+        column = df[name].astype(object)
+        return column.where(column.notna(), None).tolist()
+
+    columns = {
+        'bank_id': df['bank'].map(bank_id_map).astype('int64').tolist(),
+        'review_text': text_column('review'),
+        'cleaned_review': text_column('cleaned_review'),
+        'rating': ratings.astype('int64').tolist(),
+        'review_date': df['date'].astype(str).tolist() if 'date' in df.columns else ['None'] * len(df),
+        'source': text_column('source', 'Google Play'),
+        'review_hash': compute_review_hashes(df).tolist(),
+    }
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+def execute_batch(cursor, sql, rows):
+    """Insert one batch, logging and skipping failing rows; returns rows inserted"""
+    if hasattr(cursor, 'getbatcherrors'):
+        # Oracle reports per-row failures without aborting the batch
+        cursor.executemany(sql, rows, batcherrors=True)
+        errors = cursor.getbatcherrors()
+        for error in errors:
+            logger.warning(f"Skipping row due to error: {error.message}")
+        return len(rows) - len(errors)
+
+    # Other DB-API drivers stop at the first bad row: undo the partial batch and retry row by row.
+    # Outside a transaction SAVEPOINT would start one that RELEASE commits, so open it first
+    if not getattr(cursor.connection, 'in_transaction', True):
+        cursor.execute("BEGIN")
+    cursor.execute("SAVEPOINT review_batch")
+    try:
+        cursor.executemany(sql, rows)
+        inserted = len(rows)
+    except Exception:
+        cursor.execute("ROLLBACK TO SAVEPOINT review_batch")
+        inserted = 0
+        for row in rows:
+            try:
+                cursor.execute(sql, row)
+                inserted += 1
+            except Exception as e:
+                logger.warning(f"Skipping row due to error: {e}")
+    cursor.execute("RELEASE SAVEPOINT review_batch")
+    return inserted
+
+def insert_reviews(connection, df, bank_id_map, batch_size=1000, commit_size=None):
+    """
+    Bulk insert reviews in batches through executemany. With commit_size set, commit
+    every time at least that many rows have been sent instead of once at the end.
+    """
     cursor = connection.cursor()
+    sql = review_insert_sql(get_dialect(connection))
+
+    valid_df, ratings = validate_reviews(df, bank_id_map)
+    rows = build_review_rows(valid_df, bank_id_map, ratings)
+
     inserted_rows = 0
+    uncommitted = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        inserted_rows += execute_batch(cursor, sql, batch)
+        uncommitted += len(batch)
+        if commit_size and uncommitted >= commit_size:
+            connection.commit()
+            uncommitted = 0
 
-    for _, row in df.iterrows():
-        bank_name = row.get('bank')
-        if bank_name not in bank_id_map:
-            logger.warning(f"Skipping row due to unknown bank: {bank_name}")
-            continue
+    connection.commit()
+    logger.info(f"Inserted {inserted_rows} rows into reviews table.")
+    return inserted_rows
+
+def stage_review_keys(cursor, dialect, hashes, batch_size=1000):
+    """Load batch keys into the staging table"""
+    if dialect != 'oracle':
+        # Oracle uses the global temporary table from database_setup
+        cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} (review_hash VARCHAR(64) PRIMARY KEY)")
+    cursor.execute(f"DELETE FROM {STAGE_TABLE}")
+    rows = [{"review_hash": value} for value in hashes]
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(f"INSERT INTO {STAGE_TABLE} (review_hash) VALUES (:review_hash)",
+                           rows[start:start + batch_size])
+
+def find_existing_keys(connection, hashes, batch_size=1000):
+    """Return the subset of hashes already stored in reviews"""
+    cursor = connection.cursor()
+    stage_review_keys(cursor, get_dialect(connection), hashes, batch_size)
+    cursor.execute(f"""
+        SELECT s.review_hash FROM {STAGE_TABLE} s
+        JOIN reviews r ON r.review_hash = s.review_hash
+    """)
+    existing = {row[0] for row in cursor.fetchall()}
+    cursor.execute(f"DELETE FROM {STAGE_TABLE}")
+    return existing
+
+def insert_new_reviews(connection, df, bank_id_map, batch_size=1000, commit_size=None):
+    """Insert only reviews whose content hash is not in the database yet"""
+    hashes = compute_review_hashes(df)
+    
+    # Collapse repeats inside the batch, then drop keys already loaded
+    first_seen = ~hashes.duplicated()
+    df, hashes = df[first_seen], hashes[first_seen]
+    existing = find_existing_keys(connection, hashes.tolist(), batch_size)
+    new_rows = ~hashes.isin(existing)
+    # End the read transaction before writing: a SQLite session that holds a read lock
+    # while asking for a write lock fails at once when another session is committing
+    connection.commit()
+
+    logger.info(f"{int(new_rows.sum())} new reviews, {len(existing)} already loaded.")
+    if not new_rows.any():
+        return 0
+    return insert_reviews(connection, df[new_rows], bank_id_map, batch_size, commit_size)
+
+def split_partitions(df, hashes, by=LOAD_PARTITION_BY, partitions=LOAD_PARTITIONS):
+    """Split reviews into {partition key: frame} by bank name or by review_hash modulo partitions"""
+    if by == 'bank':
+        keys = 'bank:' + df['bank'].astype(object).fillna('').astype(str)
+    elif by == 'hash':
+        buckets = hashes.map(lambda value: int(value[:8], 16) % partitions)
+        keys = buckets.map(lambda bucket: f"hash:{bucket}/{partitions}")
+    else:
+        raise ValueError(f"Unknown partitioning: {by!r} (expected 'bank' or 'hash')")
+    return {key: frame for key, frame in df.groupby(keys.to_numpy(), sort=True)}
+
+def partition_digest(hashes):
+    """Fingerprint of a partition's rows, so a changed input is not mistaken for a finished partition"""
+    return hashlib.sha256('\n'.join(sorted(hashes)).encode('utf-8')).hexdigest()
 
-        try:
-            rating = int(row.get('rating'))
-        except (ValueError, TypeError):
-            logger.warning(f"Skipping row due to invalid rating: {row.get('rating')}")
+def load_partition(key, df, bank_id_map, batch_size=LOAD_BATCH_SIZE, commit_size=LOAD_COMMIT_SIZE):
+    """Load one partition on its own pooled session; returns its throughput stats"""
+    connection = connect_to_db()
+    if not connection:
+        raise RuntimeError(f"No database session for partition {key}")
+
+    start = time.perf_counter()
+    try:
+        inserted = insert_new_reviews(connection, df, bank_id_map, batch_size, commit_size)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        release_connection(connection)
+    elapsed = time.perf_counter() - start
+
+    rows_per_sec = len(df) / elapsed if elapsed else 0.0
+    logger.info(f"Partition {key}: {inserted} of {len(df)} rows inserted in {elapsed:.1f}s "
+                f"({rows_per_sec:,.0f} rows/sec, {threading.current_thread().name})")
+    return {'partition': key, 'rows': len(df), 'inserted': inserted, 'seconds': elapsed, 'rows_per_sec': rows_per_sec}
+
+def parallel_load(df, bank_id_map, workers=LOAD_WORKERS, by=LOAD_PARTITION_BY, partitions=LOAD_PARTITIONS,
+                  batch_size=LOAD_BATCH_SIZE, commit_size=LOAD_COMMIT_SIZE, completed=None, on_complete=None):
+    """
+    Load reviews partition by partition, each partition on its own worker thread and pooled
+    session. completed maps partition keys to the digests of partitions an earlier run
+    finished; matching partitions are skipped. on_complete(key, digest) runs as each
+    partition succeeds. Returns (per-partition stats, failed partition keys).
+    """
+    completed = completed or {}
+    hashes = compute_review_hashes(df)
+    pending = {}
+    for key, frame in split_partitions(df, hashes, by, partitions).items():
+        digest = partition_digest(hashes[frame.index])
+        if completed.get(key) == digest:
+            logger.info(f"Partition {key}: already loaded, skipping")
             continue
+        pending[key] = (frame, digest)
+
+    results = []
+    failed = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending) or 1))) as executor:
+        futures = {executor.submit(load_partition, key, frame, bank_id_map, batch_size, commit_size): key
+                   for key, (frame, _) in pending.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Partition {key} failed: {e}")
+                failed.append(key)
+                continue
+            if on_complete:
+                on_complete(key, pending[key][1])
+    elapsed = time.perf_counter() - start
+
+    rows = sum(result['rows'] for result in results)
+    logger.info(f"Loaded {len(results)} of {len(pending)} partitions ({rows} rows) in {elapsed:.1f}s "
+                f"with {workers} workers ({rows / elapsed if elapsed else 0.0:,.0f} rows/sec overall).")
+    return results, sorted(failed)
+
+def merge_duplicate_reviews(cursor, dialect, duplicates, batch_size=1000):
+    """Point theme rows of each duplicate at the review kept in its place, then delete the duplicate"""
+    statements = []
+    if table_exists(cursor, 'themes', dialect):
+        statements.append("UPDATE themes SET review_id = :review_id WHERE review_id = :duplicate_id")
+    if table_exists(cursor, 'review_themes', dialect):
+        statements += [
+            # Themes the kept review already has would collide with the primary key
+            """DELETE FROM review_themes WHERE review_id = :duplicate_id AND theme_id IN (
+                   SELECT theme_id FROM review_themes WHERE review_id = :review_id)""",
+            "UPDATE review_themes SET review_id = :review_id WHERE review_id = :duplicate_id",
+        ]
+    deletes = [{"duplicate_id": row["duplicate_id"]} for row in duplicates]
 
-        try:
-            cursor.execute("""
-                INSERT INTO reviews 
-                (bank_id, review_text, cleaned_review, rating, review_date, source)
-                VALUES (:bank_id, :review_text, :cleaned_review, :rating, TO_DATE(:review_date, 'YYYY-MM-DD'), :source)
-            """, {
-                "bank_id": bank_id_map[bank_name],
-                "review_text": row.get('review'),
-                "cleaned_review": row.get('cleaned_review'),
-                "rating": rating,
-                "review_date": str(row.get('date')),
-                "source": row.get('source', 'Google Play')
-            })
-            inserted_rows += 1
-        except Exception as e:
-            logger.warning(f"Skipping row due to error: {e}")
+    for start in range(0, len(duplicates), batch_size):
+        for statement in statements:
+            cursor.executemany(statement, duplicates[start:start + batch_size])
+        cursor.executemany("DELETE FROM reviews WHERE review_id = :duplicate_id", deletes[start:start + batch_size])
 
+def backfill_review_hashes(connection, batch_size=1000):
+    """
+    Fill review_hash for rows loaded before the column existed. Legacy copies of the same
+    review would collide on uq_review_hash, so they are merged into one row first: the row
+    that already carries the hash, else the lowest review_id.
+    """
+    dialect = get_dialect(connection)
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT r.review_id, b.bank_name, r.review_date, r.review_text
+        FROM reviews r JOIN banks b ON b.bank_id = r.bank_id
+        WHERE r.review_hash IS NULL
+        ORDER BY r.review_id
+    """)
+    hashed = []
+    for review_id, bank_name, review_date, review_text in cursor.fetchall():
+        if hasattr(review_text, 'read'):
+            review_text = review_text.read()
+        if hasattr(review_date, 'strftime'):
+            review_date = review_date.strftime('%Y-%m-%d')
+        hashed.append((review_id, review_hash(bank_name, review_date, review_text)))
+    if not hashed:
+        connection.commit()
+        return 0
+
+    # Rows loaded since the column existed keep their place
+    stage_review_keys(cursor, dialect, list(dict.fromkeys(value for _, value in hashed)), batch_size)
+    cursor.execute(f"""
+        SELECT s.review_hash, r.review_id FROM {STAGE_TABLE} s
+        JOIN reviews r ON r.review_hash = s.review_hash
+    """)
+    keep = dict(cursor.fetchall())
+    cursor.execute(f"DELETE FROM {STAGE_TABLE}")
+
+    updates = []
+    duplicates = []
+    for review_id, value in hashed:
+        if value in keep:
+            duplicates.append({"duplicate_id": review_id, "review_id": keep[value]})
+        else:
+            keep[value] = review_id
+            updates.append({"review_hash": value, "review_id": review_id})
+
+    merge_duplicate_reviews(cursor, dialect, duplicates, batch_size)
+    for start in range(0, len(updates), batch_size):
+        cursor.executemany("UPDATE reviews SET review_hash = :review_hash WHERE review_id = :review_id",
+                           updates[start:start + batch_size])
     connection.commit()
-    logger.info(f"Inserted {inserted_rows} rows into reviews table.")
+    if duplicates:
+        logger.info(f"Merged {len(duplicates)} duplicate legacy reviews into their first copy.")
+    if updates:
+        logger.info(f"Backfilled review_hash for {len(updates)} existing reviews.")
+    return len(updates)
+
+def create_analysis_stages(cursor, dialect):
+    """Empty the sentiment and theme staging tables, creating them on SQLite"""
+    if dialect != 'oracle':
+        # Oracle uses the global temporary tables from database_setup
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {ANALYSIS_STAGE_TABLE} (
+                review_hash VARCHAR(64) PRIMARY KEY, sentiment TEXT, sentiment_score REAL, keywords TEXT
+            )
+        """)
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {THEME_STAGE_TABLE} (
+                review_hash VARCHAR(64) NOT NULL, theme_name TEXT NOT NULL
+            )
+        """)
+    cursor.execute(f"DELETE FROM {ANALYSIS_STAGE_TABLE}")
+    cursor.execute(f"DELETE FROM {THEME_STAGE_TABLE}")
+
+def build_analysis_rows(df, hashes, keywords=None):
+    """Bind dictionaries of sentiment label, score and keywords per review hash"""
+    def optional_column(name):
+        if name not in df.columns:
+            return pd.Series(None, index=df.index, dtype=object)
+        return df[name].astype(object)
+
+    sentiments = optional_column('sentiment')
+    sentiments = sentiments.where(sentiments.isin(SENTIMENT_LABELS), None)
+    scores = pd.to_numeric(optional_column('sentiment_score'), errors='coerce').round(2)
+    scores = scores.astype(object).where(scores.notna(), None)
+    if keywords is None:
+        keywords = pd.Series(None, index=df.index, dtype=object)
+    keywords = keywords.reindex(df.index).astype(object)
+    keywords = keywords.where(keywords.notna(), None).map(
+        lambda value: value[:KEYWORDS_MAX_LENGTH] if value else None)
+
+    first_seen = ~hashes.duplicated()
+    columns = {
+        'review_hash': hashes[first_seen].tolist(),
+        'sentiment': sentiments[first_seen].tolist(),
+        'sentiment_score': [None if value is None else float(value) for value in scores[first_seen]],
+        'keywords': keywords[first_seen].tolist(),
+    }
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+def merge_analysis_sql(dialect):
+    """Set-based update of reviews from the analysis staging table; staged NULL keywords keep the stored ones"""
+    if dialect == 'oracle':
+        return f"""
+            MERGE INTO reviews r
+            USING {ANALYSIS_STAGE_TABLE} s ON (r.review_hash = s.review_hash)
+            WHEN MATCHED THEN UPDATE SET
+                r.sentiment = s.sentiment, r.sentiment_score = s.sentiment_score,
+                r.keywords = COALESCE(s.keywords, r.keywords)
+        """
+    return f"""
+        UPDATE reviews
+        SET sentiment = s.sentiment, sentiment_score = s.sentiment_score,
+            keywords = COALESCE(s.keywords, reviews.keywords)
+        FROM {ANALYSIS_STAGE_TABLE} s
+        WHERE reviews.review_hash = s.review_hash
+    """
+
+def load_sentiment(connection, df, keywords=None, batch_size=1000):
+    """
+    Stage sentiment label, score and keywords per review, then update the matching
+    reviews in one MERGE (Oracle) or UPDATE ... FROM (SQLite). Returns rows updated.
+    """
+    dialect = get_dialect(connection)
+    cursor = connection.cursor()
+    create_analysis_stages(cursor, dialect)
+
+    rows = build_analysis_rows(df, compute_review_hashes(df), keywords)
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(f"""
+            INSERT INTO {ANALYSIS_STAGE_TABLE} (review_hash, sentiment, sentiment_score, keywords)
+            VALUES (:review_hash, :sentiment, :sentiment_score, :keywords)
+        """, rows[start:start + batch_size])
+
+    cursor.execute(merge_analysis_sql(dialect))
+    updated = cursor.rowcount
+    cursor.execute(f"DELETE FROM {ANALYSIS_STAGE_TABLE}")
+    logger.info(f"Updated sentiment for {updated} of {len(rows)} staged reviews.")
+    return updated
+
+def ensure_themes(cursor, dialect, theme_names):
+    """Add missing theme names to the theme dimension"""
+    from_dual = " FROM dual" if dialect == 'oracle' else ""
+    for name in theme_names:
+        cursor.execute(f"""
+            INSERT INTO theme (theme_id, theme_name)
+            SELECT (SELECT COALESCE(MAX(theme_id), 0) + 1 FROM theme), :theme_name{from_dual}
+            WHERE NOT EXISTS (SELECT 1 FROM theme WHERE theme_name = :theme_name)
+        """, {"theme_name": name})
+
+def load_themes(connection, df, review_themes, batch_size=1000):
+    """
+    Replace the review_themes rows of the staged reviews. review_themes maps review_id
+    (an index label of df) to a theme name; reviews are resolved to database review_ids
+    with a single join on review_hash. Returns the mapping rows inserted.
+    """
+    dialect = get_dialect(connection)
+    cursor = connection.cursor()
+    create_analysis_stages(cursor, dialect)
+
+    hashes = compute_review_hashes(df)
+    staged = pd.DataFrame({
+        'review_hash': hashes.reindex(review_themes['review_id']).to_numpy(),
+        'theme_name': review_themes['theme'].astype(object).to_numpy(),
+    }).dropna().drop_duplicates()
+    ensure_themes(cursor, dialect, sorted(staged['theme_name'].unique()))
+
+    rows = staged.to_dict('records')
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(f"""
+            INSERT INTO {THEME_STAGE_TABLE} (review_hash, theme_name) VALUES (:review_hash, :theme_name)
+        """, rows[start:start + batch_size])
+
+    # Reruns replace a review's themes rather than accumulating stale matches
+    cursor.execute(f"""
+        DELETE FROM review_themes WHERE review_id IN (
+            SELECT r.review_id FROM reviews r
+            JOIN {THEME_STAGE_TABLE} s ON s.review_hash = r.review_hash
+        )
+    """)
+    cursor.execute(f"""
+        INSERT INTO review_themes (review_id, theme_id)
+        SELECT DISTINCT r.review_id, t.theme_id
+        FROM {THEME_STAGE_TABLE} s
+        JOIN reviews r ON r.review_hash = s.review_hash
+        JOIN theme t ON t.theme_name = s.theme_name
+    """)
+    inserted = cursor.rowcount
+    cursor.execute(f"DELETE FROM {THEME_STAGE_TABLE}")
+    logger.info(f"Inserted {inserted} review theme rows from {len(rows)} staged matches.")
+    return inserted
+
+def load_analysis(connection, df, reviews=None, review_themes=None, batch_size=1000):
+    """Load sentiment, keywords and themes for reviews already in the database, in one transaction"""
+    keywords = None
+    if reviews is not None and 'keywords' in reviews.columns:
+        keywords = reviews.set_index('review_id')['keywords']
+    try:
+        updated = load_sentiment(connection, df, keywords, batch_size)
+        inserted = load_themes(connection, df, review_themes, batch_size) if review_themes is not None else 0
+        connection.commit()
+        return updated, inserted
+    except Exception:
+        connection.rollback()
+        raise
+
+def load_analysis_main():
+    if not os.path.isfile(SENTIMENT_PATH) and not os.path.isfile(csv_path_for(SENTIMENT_PATH)):
+        logger.error(f"Data file '{SENTIMENT_PATH}' not found.")
+        sys.exit(1)
+
+    try:
+        df = read_dataset(SENTIMENT_PATH, columns=['bank', 'date', 'review', 'sentiment', 'sentiment_score'])
+        reviews = read_dataset(THEME_REVIEWS_PATH, columns=['review_id', 'keywords']) \
+            if os.path.isfile(THEME_REVIEWS_PATH) else None
+        review_themes = read_dataset(THEME_MAP_PATH, columns=['review_id', 'theme']) \
+            if os.path.isfile(THEME_MAP_PATH) else None
+    except Exception as e:
+        logger.error(f"Failed to load data: {e}")
+        sys.exit(1)
+
+    connection = connect_to_db()
+    if not connection:
+        sys.exit(1)
+
+    try:
+        if any(load_analysis(connection, df, reviews, review_themes)):
+            mark_load_complete()
+    finally:
+        release_connection(connection)
+        logger.info("Database connection released.")
+
+def load_progress(path=LOAD_PROGRESS_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_progress(progress, path=LOAD_PROGRESS_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(progress, f, indent=2)
+
+def parallel_load_main(df, bank_id_map):
+    # A progress file means the last parallel load stopped early: skip the partitions it finished
+    progress = load_progress()
+    progress.setdefault('completed', {})
+    if progress['completed']:
+        logger.info(f"Resuming load: {len(progress['completed'])} partitions already loaded")
+
+    def on_complete(key, digest):
+        progress['completed'][key] = digest
+        save_progress(progress)
+
+    results, failed = parallel_load(df, bank_id_map, completed=progress['completed'], on_complete=on_complete)
+    if any(result['inserted'] for result in results):
+        mark_load_complete()
+    for result in results:
+        logger.info(f"{result['partition']}: {result['inserted']} inserted, {result['rows_per_sec']:,.0f} rows/sec")
+    if failed:
+        logger.error(f"Partitions failed: {', '.join(failed)}; rerun with --parallel to retry them")
+        sys.exit(1)
+    elif os.path.exists(LOAD_PROGRESS_PATH):
+        os.remove(LOAD_PROGRESS_PATH)
 
 def main():
-    if not os.path.isfile(CSV_FILE_PATH):
-        logger.error(f"CSV file '{CSV_FILE_PATH}' not found.")
+    # Pass --analysis to load sentiment and themes for reviews already in the database
+    if '--analysis' in sys.argv[1:]:
+        load_analysis_main()
         return
 
+    if not os.path.isfile(DATA_FILE_PATH) and not os.path.isfile(csv_path_for(DATA_FILE_PATH)):
+        logger.error(f"Data file '{DATA_FILE_PATH}' not found.")
+        sys.exit(1)
+
     try:
-        df = pd.read_csv(CSV_FILE_PATH)
+        df = read_dataset(DATA_FILE_PATH)
     except Exception as e:
-        logger.error(f"Failed to load CSV: {e}")
-        return
+        logger.error(f"Failed to load data: {e}")
+        sys.exit(1)
 
     connection = connect_to_db()
     if not connection:
-        return
+        sys.exit(1)
 
+    # Pass --parallel to load partitions on LOAD_WORKERS sessions at once
+    parallel = '--parallel' in sys.argv[1:]
     try:
         bank_id_map = insert_banks_and_get_ids(connection, df)
         if not bank_id_map:
             logger.error("No banks inserted or retrieved. Aborting review insertion.")
-            return
+            sys.exit(1)
 
-        insert_reviews(connection, df, bank_id_map)
+        changed = backfill_review_hashes(connection)
+        if not parallel:
+            changed += insert_new_reviews(connection, df, bank_id_map)
+        if changed:
+            mark_load_complete()
     finally:
-        connection.close()
-        logger.info("Database connection closed.")
+        release_connection(connection)
+        logger.info("Database connection released.")
+
+    if parallel:
+        parallel_load_main(df, bank_id_map)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,176 @@
+import oracledb as cx_Oracle
+import os
+import queue
+import sqlite3
+import logging
+import threading
+from dotenv import load_dotenv
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Database connection parameters (override through the environment or .env)
+DB_BACKEND = os.getenv('DB_BACKEND', 'oracle')  # 'oracle' or 'sqlite' for local runs
+ORACLE_USER = os.getenv('ORACLE_USER', 'demouser')
+ORACLE_PASSWORD = os.getenv('ORACLE_PASSWORD', 'demouser')
+ORACLE_DSN = os.getenv('ORACLE_DSN', 'localhost:1521/XEPDB1')
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/bank_reviews.db')
+SQLITE_TIMEOUT = float(os.getenv('SQLITE_TIMEOUT', '60'))  # Seconds a session waits for another writer's lock
+POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+POOL_MAX = int(os.getenv('DB_POOL_MAX', '4'))
+POOL_INCREMENT = int(os.getenv('DB_POOL_INCREMENT', '1'))
+
+_pool = None
+_pool_lock = threading.Lock()
+_bank_id_cache = {}  # Database identity -> {bank name: bank id}
+
+class SQLitePool:
+    """Minimal stand-in for an oracledb session pool backed by SQLite"""
+
+    def __init__(self, path, max_size=POOL_MAX):
+        self.path = path
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.max_size:
+                self._opened += 1
+                return sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT, check_same_thread=False)
+        # Pool exhausted: wait for a session to be released
+        return self._idle.get()
+
+    def release(self, connection):
+        connection.rollback()
+        self._idle.put(connection)
+
+    def close(self, force=False):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+            self._opened -= 1
+
+def create_pool(backend=None, min_size=POOL_MIN, max_size=POOL_MAX, increment=POOL_INCREMENT):
+    """Create a session pool for the configured backend"""
+    backend = backend or DB_BACKEND
+    if backend == 'sqlite':
+        directory = os.path.dirname(SQLITE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return SQLitePool(SQLITE_PATH, max_size=max_size)
+    return cx_Oracle.create_pool(
+        user=ORACLE_USER,
+        password=ORACLE_PASSWORD,
+        dsn=ORACLE_DSN,
+        min=min_size,
+        max=max_size,
+        increment=increment
+    )
+
+def get_pool():
+    """Return the process-wide pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = create_pool()
+            logger.info(f"Created {DB_BACKEND} session pool (max {POOL_MAX} sessions).")
+        return _pool
+
+def set_pool(pool):
+    """Install a pool, e.g. a SQLitePool for local runs; returns the previous one"""
+    global _pool
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    clear_bank_id_cache()
+    return previous
+
+def get_connection():
+    """Acquire a pooled connection, or None if the database is unreachable"""
+    try:
+        connection = get_pool().acquire()
+        logger.info("Acquired database connection from pool.")
+        return connection
+    except Exception as e:
+        logger.error(f"Failed to connect to the database: {e}")
+        return None
+
+def release_connection(connection):
+    """Return a connection to the pool"""
+    get_pool().release(connection)
+
+def close_pool():
+    """Close the process-wide pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close(force=True)
+            _pool = None
+
+def get_dialect(connection):
+    """Return 'oracle' for oracledb connections, else the DB-API module name (e.g. 'sqlite3')"""
+    module = type(connection).__module__.split('.')[0]
+    return 'oracle' if module == 'oracledb' else module
+
+def get_database_identity(connection):
+    """Which database a connection points at: Oracle user@DSN, a SQLite file path, or the connection itself when in memory"""
+    if get_dialect(connection) == 'oracle':
+        return f"{connection.username}@{connection.dsn}"
+    cursor = connection.cursor()
+    cursor.execute("PRAGMA database_list")
+    path = next((row[2] for row in cursor.fetchall() if row[1] == 'main'), '')
+    return os.path.abspath(path) if path else f"memory:{id(connection)}"
+
+def lookup_or_create_banks(connection, bank_names):
+    """Return {bank_name: bank_id}, inserting any missing banks"""
+    cursor = connection.cursor()
+    rows = [{"bank_name": name} for name in bank_names]
+    if not rows:
+        return {}
+
+    if get_dialect(connection) == 'oracle':
+        # One round trip: an array-bound PL/SQL block merges each bank and returns its id
+        bank_ids = cursor.var(int, arraysize=len(rows))
+        cursor.setinputsizes(bank_id=bank_ids)
+        cursor.executemany("""
+            BEGIN
+                MERGE INTO banks b
+                USING (SELECT :bank_name AS bank_name FROM dual) s
+                ON (b.bank_name = s.bank_name)
+                WHEN NOT MATCHED THEN
+                    INSERT (bank_name, app_name, play_store_url) VALUES (s.bank_name, s.bank_name, NULL);
+                SELECT MIN(bank_id) INTO :bank_id FROM banks WHERE bank_name = :bank_name;
+            END;
+        """, rows)
+        return {name: int(bank_ids.getvalue(i)) for i, name in enumerate(bank_names)}
+
+    cursor.executemany("""
+        INSERT INTO banks (bank_name, app_name, play_store_url)
+        SELECT :bank_name, :bank_name, NULL
+        WHERE NOT EXISTS (SELECT 1 FROM banks WHERE bank_name = :bank_name)
+    """, rows)
+    placeholders = ', '.join('?' for _ in bank_names)
+    cursor.execute(f"SELECT bank_name, MIN(bank_id) FROM banks WHERE bank_name IN ({placeholders}) GROUP BY bank_name",
+                   list(bank_names))
+    return {name: int(bank_id) for name, bank_id in cursor.fetchall()}
+
+def get_bank_ids(connection, bank_names):
+    """Resolve bank ids through the in-process cache, hitting the database only for new names"""
+    # Ids are only valid for the database they came from, so each one has its own cache
+    bank_ids = _bank_id_cache.setdefault(get_database_identity(connection), {})
+    bank_names = list(dict.fromkeys(bank_names))
+    missing = [name for name in bank_names if name not in bank_ids]
+    if missing:
+        bank_ids.update(lookup_or_create_banks(connection, missing))
+    return {name: bank_ids[name] for name in bank_names}
+
+def clear_bank_id_cache():
+    """Forget cached bank ids, e.g. after the banks table is rebuilt"""
+    _bank_id_cache.clear()
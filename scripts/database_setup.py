@@ -1,12 +1,16 @@
 import oracledb as cx_Oracle
 import os
+import sqlite3
 import logging
-from dotenv import load_dotenv
+from collections import namedtuple
+from database import DB_BACKEND, get_connection, release_connection, get_dialect
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PARTITION_REVIEWS = os.getenv('DB_PARTITION_REVIEWS', '0') == '1'  # Monthly range partitions (Oracle only)
+
 def setup_oracle_client():
     """Configure Oracle client environment"""
     try:
@@ -18,92 +22,272 @@ def setup_oracle_client():
         return False
 
 def create_connection():
-    """Create connection using your verified credentials"""
-    load_dotenv()
-    try:
-        connection = cx_Oracle.connect(
-            user=os.getenv('ORACLE_USER', 'DEMOUSER'),
-            password=os.getenv('ORACLE_PASSWORD', 'demouser'),
-            dsn="localhost:1521/XEPDB1"
-        )
+    """Acquire a connection from the shared session pool"""
+    connection = get_connection()
+    if connection:
         logger.info("Successfully connected to Oracle XEPDB1")
-        return connection
-    except cx_Oracle.DatabaseError as e:
-        error, = e.args
-        logger.error(f"Connection failed: ORA-{error.code}: {error.message}")
-        return None
+    return connection
 
-def table_exists(cursor, table_name):
+def table_exists(cursor, table_name, dialect='oracle'):
     """Check if a table exists in the current schema"""
+    if dialect == 'oracle':
+        cursor.execute("""
+            SELECT COUNT(*) FROM user_tables WHERE table_name = :table_name
+        """, {"table_name": table_name.upper()})
+    else:
+        cursor.execute("""
+            SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND UPPER(name) = :table_name
+        """, {"table_name": table_name.upper()})
+    return cursor.fetchone()[0] > 0
+
+def column_exists(cursor, table_name, column_name, dialect='oracle'):
+    """Check if a column exists on a table in the current schema"""
+    if dialect == 'oracle':
+        cursor.execute("""
+            SELECT COUNT(*) FROM user_tab_columns
+            WHERE table_name = :table_name AND column_name = :column_name
+        """, {"table_name": table_name.upper(), "column_name": column_name.upper()})
+        return cursor.fetchone()[0] > 0
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    return any(row[1].upper() == column_name.upper() for row in cursor.fetchall())
+
+def index_exists(cursor, index_name, dialect='oracle'):
+    """Check if an index exists in the current schema"""
+    if dialect == 'oracle':
+        cursor.execute("""
+            SELECT COUNT(*) FROM user_indexes WHERE index_name = :index_name
+        """, {"index_name": index_name.upper()})
+    else:
+        cursor.execute("""
+            SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND UPPER(name) = :index_name
+        """, {"index_name": index_name.upper()})
+    return cursor.fetchone()[0] > 0
+
+def is_partitioned(cursor, table_name):
     cursor.execute("""
-        SELECT COUNT(*) FROM user_tables WHERE table_name = :table_name
-    """, [table_name.upper()])
+        SELECT COUNT(*) FROM user_part_tables WHERE table_name = :table_name
+    """, {"table_name": table_name.upper()})
     return cursor.fetchone()[0] > 0
 
-def create_tables(connection):
-    """Create the required tables if they don't already exist"""
-    try:
-        with connection.cursor() as cursor:
-            # BANKS
-            if not table_exists(cursor, 'BANKS'):
-                cursor.execute("""
-                CREATE TABLE banks (
-                    bank_id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-                    bank_name VARCHAR2(100) NOT NULL,
-                    app_name VARCHAR2(100),
-                    play_store_url VARCHAR2(255)
-                )
-                """)
-                logger.info("Created table: BANKS")
-            else:
-                logger.info("Table already exists: BANKS")
-
-            # REVIEWS
-            if not table_exists(cursor, 'REVIEWS'):
-                cursor.execute("""
-                CREATE TABLE reviews (
-                    review_id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-                    bank_id NUMBER REFERENCES banks(bank_id),
-                    review_text CLOB NOT NULL,
-                    cleaned_review CLOB,
-                    rating NUMBER(1) NOT NULL,
-                    review_date DATE NOT NULL,
-                    source VARCHAR2(50) DEFAULT 'Google Play',
+# One schema object: created by statements unless it already exists.
+# kind is 'table', 'column' (on table) or 'index'; pre-versioning databases already have some of them.
+Step = namedtuple('Step', ['kind', 'table', 'name', 'statements'])
+
+def step_applied(cursor, step, dialect):
+    if step.kind == 'table':
+        return table_exists(cursor, step.name, dialect)
+    if step.kind == 'column':
+        return column_exists(cursor, step.table, step.name, dialect)
+    return index_exists(cursor, step.name, dialect)
+
+def schema_migrations(dialect):
+    """Ordered (version, description, steps) with DDL generated for 'oracle' or 'sqlite3'"""
+    oracle = dialect == 'oracle'
+    identity = "NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY" if oracle else "INTEGER PRIMARY KEY"
+    integer = "NUMBER" if oracle else "INTEGER"
+    text = "CLOB" if oracle else "TEXT"
+
+    def varchar(size):
+        return f"VARCHAR2({size})" if oracle else "TEXT"
+
+    baseline = [
+        Step('table', None, 'banks', [f"""
+            CREATE TABLE banks (
+                bank_id {identity},
+                bank_name {varchar(100)} NOT NULL,
+                app_name {varchar(100)},
+                play_store_url {varchar(255)}
+            )
+        """]),
+        Step('table', None, 'reviews', [f"""
+            CREATE TABLE reviews (
+                review_id {identity},
+                bank_id {integer} REFERENCES banks(bank_id),
+                review_text {text} NOT NULL,
+                cleaned_review {text},
+                rating {"NUMBER(1)" if oracle else "INTEGER"} NOT NULL,
+                review_date {"DATE" if oracle else "TEXT"} NOT NULL,
+                source {varchar(50)} DEFAULT 'Google Play',
+                sentiment {varchar(10)},
+                sentiment_score {"NUMBER(3,2)" if oracle else "REAL"},
+                review_hash {varchar(64)},
+                CONSTRAINT uq_review_hash UNIQUE (review_hash),
+                CONSTRAINT chk_rating CHECK (rating BETWEEN 1 AND 5),
+                CONSTRAINT chk_sentiment CHECK (sentiment IN ('POSITIVE', 'NEGATIVE', 'NEUTRAL'))
+            )
+        """]),
+        Step('column', 'reviews', 'review_hash', [
+            "ALTER TABLE reviews ADD (review_hash VARCHAR2(64))",
+            "ALTER TABLE reviews ADD CONSTRAINT uq_review_hash UNIQUE (review_hash)"
+        ] if oracle else [
+            "ALTER TABLE reviews ADD COLUMN review_hash TEXT",
+            "CREATE UNIQUE INDEX uq_review_hash ON reviews (review_hash)"
+        ]),
+        Step('table', None, 'themes', [f"""
+            CREATE TABLE themes (
+                theme_id {identity},
+                review_id {integer} REFERENCES reviews(review_id),
+                theme_name {varchar(50)} NOT NULL,
+                keywords {text}
+            )
+        """]),
+    ]
+    if oracle:
+        # SQLite sessions create their own TEMP staging table in data_insertion
+        baseline.append(Step('table', None, 'review_keys_stage', ["""
+            CREATE GLOBAL TEMPORARY TABLE review_keys_stage (
+                review_hash VARCHAR2(64) PRIMARY KEY
+            ) ON COMMIT DELETE ROWS
+        """]))
+
+    query_ready = [
+        Step('index', 'reviews', 'idx_reviews_bank_date',
+             ["CREATE INDEX idx_reviews_bank_date ON reviews (bank_id, review_date)"]),
+        Step('index', 'reviews', 'idx_reviews_sentiment',
+             ["CREATE INDEX idx_reviews_sentiment ON reviews (sentiment)"]),
+        Step('index', 'themes', 'idx_themes_review_theme',
+             ["CREATE INDEX idx_themes_review_theme ON themes (review_id, theme_name)"]),
+        # Keywords once per review instead of a CLOB on every theme row
+        Step('column', 'reviews', 'keywords', [
+            "ALTER TABLE reviews ADD (keywords VARCHAR2(4000))" if oracle else
+            "ALTER TABLE reviews ADD COLUMN keywords TEXT"
+        ]),
+        Step('table', None, 'theme', [f"""
+            CREATE TABLE theme (
+                theme_id {"NUMBER(5)" if oracle else "INTEGER"} PRIMARY KEY,
+                theme_name {varchar(100)} NOT NULL,
+                CONSTRAINT uq_theme_name UNIQUE (theme_name)
+            )
+        """]),
+        Step('table', None, 'review_themes', [f"""
+            CREATE TABLE review_themes (
+                review_id {integer} NOT NULL REFERENCES reviews(review_id),
+                theme_id {"NUMBER(5)" if oracle else "INTEGER"} NOT NULL REFERENCES theme(theme_id),
+                CONSTRAINT pk_review_themes PRIMARY KEY (review_id, theme_id)
+            ){" ORGANIZATION INDEX" if oracle else ""}
+        """]),
+        Step('index', 'review_themes', 'idx_review_themes_theme',
+             ["CREATE INDEX idx_review_themes_theme ON review_themes (theme_id, review_id)"]),
+    ]
+
+    analysis_staging = []
+    if oracle:
+        # Staging for the sentiment/theme loader; SQLite sessions use TEMP tables instead
+        analysis_staging = [
+            Step('table', None, 'review_analysis_stage', ["""
+                CREATE GLOBAL TEMPORARY TABLE review_analysis_stage (
+                    review_hash VARCHAR2(64) PRIMARY KEY,
                     sentiment VARCHAR2(10),
                     sentiment_score NUMBER(3,2),
-                    CONSTRAINT chk_rating CHECK (rating BETWEEN 1 AND 5),
-                    CONSTRAINT chk_sentiment CHECK (sentiment IN ('POSITIVE', 'NEGATIVE', 'NEUTRAL'))
-                )
-                """)
-                logger.info("Created table: REVIEWS")
-            else:
-                logger.info("Table already exists: REVIEWS")
-
-            # THEMES
-            if not table_exists(cursor, 'THEMES'):
-                cursor.execute("""
-                CREATE TABLE themes (
-                    theme_id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-                    review_id NUMBER REFERENCES reviews(review_id),
-                    theme_name VARCHAR2(50) NOT NULL,
-                    keywords CLOB
-                )
-                """)
-                logger.info("Created table: THEMES")
-            else:
-                logger.info("Table already exists: THEMES")
-
-            connection.commit()
-            return True
+                    keywords VARCHAR2(4000)
+                ) ON COMMIT DELETE ROWS
+            """]),
+            Step('table', None, 'review_theme_stage', ["""
+                CREATE GLOBAL TEMPORARY TABLE review_theme_stage (
+                    review_hash VARCHAR2(64) NOT NULL,
+                    theme_name VARCHAR2(100) NOT NULL
+                ) ON COMMIT DELETE ROWS
+            """]),
+        ]
+
+    return [
+        (1, 'Base tables', baseline),
+        (2, 'Query indexes, theme dimension and review_themes mapping', query_ready),
+        (3, 'Staging tables for sentiment and theme loads', analysis_staging),
+    ]
+
+def schema_version_ddl(dialect):
+    if dialect == 'oracle':
+        return """
+            CREATE TABLE schema_version (
+                version NUMBER PRIMARY KEY,
+                description VARCHAR2(200),
+                applied_at TIMESTAMP DEFAULT SYSTIMESTAMP
+            )
+        """
+    return """
+        CREATE TABLE schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """
+
+def current_schema_version(cursor, dialect):
+    if not table_exists(cursor, 'SCHEMA_VERSION', dialect):
+        cursor.execute(schema_version_ddl(dialect))
+        logger.info("Created table: SCHEMA_VERSION")
+    cursor.execute("SELECT MAX(version) FROM schema_version")
+    return cursor.fetchone()[0] or 0
+
+def partition_reviews(cursor):
+    """Convert reviews to monthly interval partitions on review_date (Oracle 12.2+, online)"""
+    if is_partitioned(cursor, 'REVIEWS'):
+        logger.info("Table already partitioned: REVIEWS")
+        return
+    cursor.execute("""
+        ALTER TABLE reviews MODIFY
+        PARTITION BY RANGE (review_date) INTERVAL (NUMTOYMINTERVAL(1, 'MONTH'))
+        (PARTITION p_initial VALUES LESS THAN (DATE '2015-01-01'))
+        ONLINE UPDATE INDEXES
+    """)
+    logger.info("Partitioned REVIEWS by month on REVIEW_DATE")
+
+def migrate(connection, partition=PARTITION_REVIEWS):
+    """Apply schema versions newer than the recorded one; returns the resulting version"""
+    dialect = get_dialect(connection)
+    cursor = connection.cursor()
+    version = current_schema_version(cursor, dialect)
+
+    for target, description, steps in schema_migrations(dialect):
+        if target <= version:
+            continue
+        for step in steps:
+            label = f"{step.table}.{step.name}" if step.kind == 'column' else step.name
+            if step_applied(cursor, step, dialect):
+                logger.info(f"Already exists: {label.upper()}")
+                continue
+            for statement in step.statements:
+                cursor.execute(statement)
+            logger.info(f"Created {step.kind}: {label.upper()}")
+        cursor.execute("INSERT INTO schema_version (version, description) VALUES (:version, :description)",
+                       {"version": target, "description": description})
+        connection.commit()
+        version = target
+        logger.info(f"Schema at version {version}: {description}")
+
+    if partition:
+        if dialect == 'oracle':
+            partition_reviews(cursor)
+        else:
+            logger.info(f"Partitioning is not available on {dialect}; skipped")
+    return version
+
+def create_tables(connection):
+    """Create the required tables and indexes by migrating to the latest schema version"""
+    try:
+        migrate(connection)
+        return True
 
     except cx_Oracle.DatabaseError as e:
         error, = e.args
         logger.error(f"Table creation failed: ORA-{error.code}: {error.message}")
         connection.rollback()
         return False
+    except sqlite3.Error as e:
+        logger.error(f"Table creation failed: {e}")
+        connection.rollback()
+        return False
+
+def list_tables(cursor, dialect):
+    if dialect == 'oracle':
+        cursor.execute("SELECT table_name FROM user_tables ORDER BY table_name")
+    else:
+        cursor.execute("SELECT UPPER(name) FROM sqlite_master WHERE type = 'table' ORDER BY name")
+    return [row[0] for row in cursor.fetchall()]
 
 def main():
-    if not setup_oracle_client():
+    if DB_BACKEND == 'oracle' and not setup_oracle_client():
         return
 
     connection = create_connection()
@@ -112,16 +296,11 @@ def main():
 
     try:
         if create_tables(connection):
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                SELECT table_name FROM user_tables 
-                WHERE table_name IN ('BANKS', 'REVIEWS', 'THEMES')
-                """)
-                tables = [row[0] for row in cursor]
-                print("\nCreated or confirmed tables:", ", ".join(tables))
+            tables = list_tables(connection.cursor(), get_dialect(connection))
+            print("\nCreated or confirmed tables:", ", ".join(tables))
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
 
 if __name__ == "__main__":
     main()
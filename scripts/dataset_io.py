@@ -0,0 +1,132 @@
+import os
+import logging
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Review datasets handed from stage to stage
+RAW_PATH = 'data/bank_reviews_raw.parquet'
+CLEAN_PATH = 'data/bank_reviews_clean.parquet'
+SENTIMENT_PATH = 'data/bank_reviews_with_sentiment.parquet'
+THEME_REVIEWS_PATH = 'data/bank_reviews_themes_reviews.parquet'  # review_id -> keywords, one row per review
+THEME_MAP_PATH = 'data/bank_reviews_themes_map.parquet'  # review_id -> theme, one row per match
+
+# Explicit Arrow types for the known review columns; other columns keep their inferred type
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+SCHEMA = {
+    'review': pa.string(),
+    'cleaned_review': pa.string(),
+    'rating': pa.int8(),
+    'date': pa.date32(),
+    'bank': CATEGORY,
+    'source': CATEGORY,
+    'sentiment': CATEGORY,
+    'sentiment_score': pa.float32(),
+    'sentiment_numeric': pa.float32(),
+}
+
+def csv_path_for(path):
+    return os.path.splitext(path)[0] + '.csv'
+
+def to_typed_frame(df):
+    """Coerce the known review columns to the pandas dtypes matching SCHEMA"""
+    df = df.copy()
+    for column, arrow_type in SCHEMA.items():
+        if column not in df.columns:
+            continue
+        if arrow_type == CATEGORY:
+            df[column] = df[column].astype('category')
+        elif arrow_type == pa.int8():
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int8')
+        elif arrow_type == pa.float32():
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float32')
+        elif arrow_type == pa.date32():
+            df[column] = pd.to_datetime(df[column], errors='coerce').dt.date
+        else:
+            df[column] = df[column].astype(object).where(df[column].notna(), None)
+    return df
+
+def to_arrow_table(df):
+    """Arrow table for a frame, with SCHEMA types for the known columns"""
+    df = to_typed_frame(df)
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    schema = pa.schema([
+        pa.field(field.name, SCHEMA.get(field.name, field.type)) for field in inferred
+    ])
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+def write_dataset(df, path, export_csv=False):
+    """Write a frame as typed Parquet, plus a CSV next to it when export_csv is set"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    pq.write_table(to_arrow_table(df), path)
+    if export_csv:
+        df.to_csv(csv_path_for(path), index=False)
+
+def read_dataset(path, columns=None):
+    """
+    Read a dataset through a memory map, loading only the requested columns.
+    Falls back to the CSV export of the same name when no Parquet file exists yet.
+    """
+    if not os.path.exists(path) and os.path.exists(csv_path_for(path)):
+        logger.info(f"{path} not found, reading {csv_path_for(path)}")
+        return to_typed_frame(pd.read_csv(csv_path_for(path), usecols=columns))
+    return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+def dataset_columns(path):
+    """Column names of a dataset without reading its rows"""
+    if not os.path.exists(path) and os.path.exists(csv_path_for(path)):
+        return list(pd.read_csv(csv_path_for(path), nrows=0).columns)
+    return pq.read_schema(path).names
+
+def iter_dataset(path, columns=None, batch_size=100000):
+    """Yield a dataset as frames of at most batch_size rows"""
+    if not os.path.exists(path) and os.path.exists(csv_path_for(path)):
+        for chunk in pd.read_csv(csv_path_for(path), usecols=columns, chunksize=batch_size):
+            yield to_typed_frame(chunk)
+        return
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
+class DatasetWriter:
+    """Append frames to one Parquet file (and optionally its CSV export) chunk by chunk"""
+
+    def __init__(self, path, export_csv=False, columns=None):
+        self.path = path
+        self.export_csv = export_csv
+        self.columns = columns  # Written as an empty dataset if no frame arrives
+        self.writer = None
+        self.rows = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def write(self, df):
+        table = to_arrow_table(df)
+        if self.writer is None:
+            # The file schema comes from the first chunk: a column that is all null there would be
+            # typed null and reject every later value, so such columns are written as strings
+            schema = pa.schema([
+                field.with_type(pa.string()) if pa.types.is_null(field.type) else field for field in table.schema
+            ])
+            self.writer = pq.ParquetWriter(self.path, schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+        if self.export_csv:
+            df.to_csv(csv_path_for(self.path), mode='w' if not self.rows else 'a', header=not self.rows, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is None:
+            write_dataset(pd.DataFrame(columns=self.columns or []), self.path, self.export_csv)
+        else:
+            self.writer.close()
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
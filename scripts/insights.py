@@ -1,28 +1,41 @@
 import os
+import sys
 import logging
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from wordcloud import WordCloud, STOPWORDS
+from wordcloud import STOPWORDS
 from collections import Counter
+from dataset_io import CLEAN_PATH, read_dataset, iter_dataset
+from database import get_connection, release_connection
+import report_queries
+from rendering import RenderJob, render_jobs, render_keyword_bar, render_wordcloud
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-DATA_PATH = '../data/bank_reviews_clean.csv'
+DATA_PATH = os.path.join('..', CLEAN_PATH)
 VISUALS_DIR = '../reports/visuals'
+CHUNK_SIZE = int(os.getenv('INSIGHTS_CHUNK_SIZE', '100000'))  # Reviews held in memory at a time
 
 os.makedirs(VISUALS_DIR, exist_ok=True)
 
 def load_data():
     logger.info(f"Loading data from {DATA_PATH}")
-    df = pd.read_csv(DATA_PATH)
+    df = read_dataset(DATA_PATH, columns=['bank', 'rating', 'cleaned_review'])
     logger.info(f"Data shape: {df.shape}")
     return df
 
-def plot_sentiment_distribution(df):
+def iter_data(batch_size=CHUNK_SIZE):
+    """Stream the columns insights needs in chunks instead of loading the whole corpus"""
+    logger.info(f"Streaming data from {DATA_PATH}")
+    return iter_dataset(DATA_PATH, columns=['bank', 'rating', 'cleaned_review'], batch_size=batch_size)
+
+def plot_sentiment_distribution(rating_counts):
+    """Bar chart of a rating -> count frame, from report_queries.rating_counts or the streamed chunks"""
     plt.figure(figsize=(8,6))
-    sns.countplot(x='rating', data=df, palette='coolwarm')
+    sns.barplot(x='rating', y='count', data=rating_counts, palette='coolwarm')
     plt.title('Rating Distribution')
     plt.xlabel('Rating')
     plt.ylabel('Count')
@@ -32,57 +45,100 @@ def plot_sentiment_distribution(df):
 
 def get_common_keywords(text_series, top_n=10):
     # Tokenize and count words excluding stopwords
-    stopwords = set(STOPWORDS)
     words = ' '.join(text_series.dropna()).lower().split()
-    words = [w.strip('.,!?()[]') for w in words if w not in stopwords and len(w) > 2]
-    counter = Counter(words)
+    counter = Counter(filter_keywords(words, set(STOPWORDS)))
     return counter.most_common(top_n)
 
-def plot_keywords(keywords, title, filename):
-    words, counts = zip(*keywords)
-    plt.figure(figsize=(8,5))
-    sns.barplot(x=list(counts), y=list(words), palette='viridis')
-    plt.title(title)
-    plt.xlabel('Frequency')
-    plt.tight_layout()
-    plt.savefig(os.path.join(VISUALS_DIR, filename))
-    plt.close()
-    logger.info(f"Saved keyword plot: {filename}")
-
-def wordcloud_from_text(text, filename):
-    wc = WordCloud(width=800, height=400, background_color='white', stopwords=STOPWORDS).generate(text)
-    plt.figure(figsize=(10,5))
-    plt.imshow(wc, interpolation='bilinear')
-    plt.axis('off')
-    plt.title('Keyword Wordcloud')
-    plt.savefig(os.path.join(VISUALS_DIR, filename))
-    plt.close()
-    logger.info(f"Saved wordcloud: {filename}")
+def filter_keywords(words, stopwords):
+    return [w.strip('.,!?()[]') for w in words if w not in stopwords and len(w) > 2]
+
+def count_bank_keywords(df, bank_names, counters=None):
+    """Add each bank's positive/negative keyword counts in df to counters; returns (counters, rows per bank)"""
+    stopwords = set(STOPWORDS)
+    wanted = {name.lower(): name for name in bank_names}
+    banks = df['bank'].astype(object).str.lower().map(wanted)
+
+    # Same split as analyze_bank: rating >=4 positive, <=2 negative, other and missing ratings ignored
+    positive = (df['rating'] >= 4).to_numpy(dtype=bool, na_value=False)
+    negative = (df['rating'] <= 2).to_numpy(dtype=bool, na_value=False)
+    polarity = pd.Series(np.where(positive, 'positive', np.where(negative, 'negative', None)), index=df.index)
+    selected = banks.notna() & polarity.notna() & df['cleaned_review'].notna()
+    texts = df.loc[selected, 'cleaned_review']
+
+    token_rows = (text.lower().split() for text in texts)
 
-def analyze_bank(df, bank_name):
+    if counters is None:
+        counters = {(name, group): Counter() for name in bank_names for group in ('positive', 'negative')}
+    for name, group, tokens in zip(banks[selected], polarity[selected], token_rows):
+        counters[(name, group)].update(filter_keywords(tokens, stopwords))
+    return counters, banks.value_counts()
+
+def bank_summaries(counters, row_counts, bank_names, top_n=10):
+    return {
+        name: {
+            'rows': int(row_counts.get(name, 0)),
+            'positive': counters[(name, 'positive')].most_common(top_n),
+            'negative': counters[(name, 'negative')].most_common(top_n),
+            'positive_frequencies': dict(counters[(name, 'positive')]),
+            'negative_frequencies': dict(counters[(name, 'negative')])
+        }
+        for name in bank_names
+    }
+
+def summarize_banks(df, bank_names, top_n=10):
+    """Top positive/negative keywords and word cloud frequencies for every bank in one pass over the reviews"""
+    counters, row_counts = count_bank_keywords(df, bank_names)
+    return bank_summaries(counters, row_counts, bank_names, top_n)
+
+def summarize_bank_chunks(chunks, bank_names, top_n=10, rating_counts=None):
+    """
+    summarize_banks over a stream of frames, holding only keyword counts between chunks.
+    Counters merge in first-seen order, so ties rank as in a single pass. When given,
+    rating_counts (a Counter) also collects the number of reviews per rating.
+    """
+    counters = None
+    row_counts = Counter()
+    for chunk in chunks:
+        counters, chunk_rows = count_bank_keywords(chunk, bank_names, counters)
+        row_counts.update(chunk_rows.to_dict())
+        if rating_counts is not None:
+            rating_counts.update(chunk['rating'].dropna().astype(int).tolist())
+    if counters is None:
+        counters = {(name, group): Counter() for name in bank_names for group in ('positive', 'negative')}
+    return bank_summaries(counters, row_counts, bank_names, top_n)
+
+def keyword_chart_job(keywords, title, filename):
+    return RenderJob(render_keyword_bar, os.path.join(VISUALS_DIR, filename), {'keywords': keywords, 'title': title})
+
+def wordcloud_job(frequencies, filename):
+    return RenderJob(render_wordcloud, os.path.join(VISUALS_DIR, filename),
+                     {'frequencies': frequencies, 'title': 'Keyword Wordcloud'})
+
+def analyze_bank(df, bank_name, summary=None, jobs=None):
     logger.info(f"Analyzing bank: {bank_name}")
-    bank_df = df[df['bank'].str.lower() == bank_name.lower()]
-    if bank_df.empty:
+    # Pass a summary from summarize_banks to skip re-scanning the reviews for each bank
+    summary = summary or summarize_banks(df, [bank_name], top_n=10)[bank_name]
+    if not summary['rows']:
         logger.warning(f"No data found for bank {bank_name}")
         return None
-    
-    # Separate positive and negative reviews (e.g., rating >=4 positive, <=2 negative)
-    pos_reviews = bank_df[bank_df['rating'] >= 4]['cleaned_review']
-    neg_reviews = bank_df[bank_df['rating'] <= 2]['cleaned_review']
 
-    pos_keywords = get_common_keywords(pos_reviews, top_n=10)
-    neg_keywords = get_common_keywords(neg_reviews, top_n=10)
+    pos_keywords = summary['positive']
+    neg_keywords = summary['negative']
     
     logger.info(f"Top positive keywords for {bank_name}: {pos_keywords}")
     logger.info(f"Top negative keywords for {bank_name}: {neg_keywords}")
     
-    # Plot keywords
-    plot_keywords(pos_keywords, f"{bank_name} - Top Positive Keywords", f"{bank_name}_positive_keywords.png")
-    plot_keywords(neg_keywords, f"{bank_name} - Top Negative Keywords", f"{bank_name}_negative_keywords.png")
-    
-    # Wordclouds
-    wordcloud_from_text(' '.join(pos_reviews.dropna()), f"{bank_name}_positive_wordcloud.png")
-    wordcloud_from_text(' '.join(neg_reviews.dropna()), f"{bank_name}_negative_wordcloud.png")
+    # Keyword charts and wordclouds; collected into jobs when given, otherwise rendered now
+    bank_jobs = [
+        keyword_chart_job(pos_keywords, f"{bank_name} - Top Positive Keywords", f"{bank_name}_positive_keywords.png"),
+        keyword_chart_job(neg_keywords, f"{bank_name} - Top Negative Keywords", f"{bank_name}_negative_keywords.png"),
+        wordcloud_job(summary['positive_frequencies'], f"{bank_name}_positive_wordcloud.png"),
+        wordcloud_job(summary['negative_frequencies'], f"{bank_name}_negative_wordcloud.png")
+    ]
+    if jobs is None:
+        render_jobs(bank_jobs)
+    else:
+        jobs.extend(bank_jobs)
 
     # Return insights summary
     return {
@@ -91,19 +147,40 @@ def analyze_bank(df, bank_name):
         'pain_points': [kw for kw, count in neg_keywords]
     }
 
+def log_database_summary(connection):
+    """Sentiment and theme aggregates computed in the database"""
+    logger.info(f"Sentiment by bank:\n{report_queries.bank_sentiment(connection)}")
+    logger.info(f"Sentiment by bank and rating:\n{report_queries.rating_sentiment(connection)}")
+    logger.info(f"Reviews per theme:\n{report_queries.theme_counts(connection)}")
+
 def main():
-    df = load_data()
-    plot_sentiment_distribution(df)
+    # Pass --db to take rating counts and sentiment/theme aggregates from the database
+    connection = get_connection() if '--db' in sys.argv[1:] else None
 
     # Example banks to compare
     banks_to_analyze = ['CBE', 'BOA']
     insights = []
+    ratings = Counter() if connection is None else None
+    summaries = summarize_bank_chunks(iter_data(), banks_to_analyze, top_n=10, rating_counts=ratings)
+    jobs = []
+
+    if connection is not None:
+        try:
+            plot_sentiment_distribution(report_queries.rating_counts(connection))
+            log_database_summary(connection)
+        finally:
+            release_connection(connection)
+    else:
+        plot_sentiment_distribution(pd.DataFrame(sorted(ratings.items()), columns=['rating', 'count']))
 
     for bank in banks_to_analyze:
-        result = analyze_bank(df, bank)
+        result = analyze_bank(None, bank, summary=summaries[bank], jobs=jobs)
         if result:
             insights.append(result)
 
+    # Draw every bank's figures together in the process pool
+    render_jobs(jobs)
+
     # Print insights summary
     for insight in insights:
         logger.info(f"Insights for {insight['bank']}:")
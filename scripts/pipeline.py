@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+STAMP_DIR = 'data/.pipeline'  # One JSON stamp per stage: hash of the inputs it last ran on
+PIPELINE_WORKERS = int(os.getenv('PIPELINE_WORKERS', '3'))  # Independent stages run at the same time
+
+# A pipeline step. Paths are relative to the repository root; the script runs from cwd.
+#   inputs: files whose content decides whether the stage must rerun
+#   code:   modules the stage imports, so code changes also rerun it
+#   env:    environment variables that change the stage's results
+Stage = namedtuple('Stage', ['name', 'script', 'args', 'cwd', 'deps', 'inputs', 'outputs', 'code', 'env'])
+
+# Scraping only reruns when the app list changes; use --force=scrape to fetch new reviews.
+# It runs incrementally, so a forced run adds to the review sink instead of rebuilding it.
+STAGES = [
+    Stage('scrape', 'scripts/scrape_reviews.py', ['--incremental'], '.', [],
+          ['config/apps.json'], ['data/bank_reviews_raw.parquet'], ['scripts/dataset_io.py'], []),
+    Stage('preprocess', 'scripts/preprocess_reviews.py', [], '.', ['scrape'],
+          ['data/bank_reviews_raw.parquet'], ['data/bank_reviews_clean.parquet'], ['scripts/dataset_io.py'], []),
+    Stage('sentiment', 'scripts/sentiment_analysis.py', [], '.', ['preprocess'],
+          ['data/bank_reviews_clean.parquet'], ['data/bank_reviews_with_sentiment.parquet'],
+          ['scripts/dataset_io.py', 'scripts/report_queries.py', 'scripts/database.py'],
+          ['SENTIMENT_BACKEND']),
+    Stage('themes', 'scripts/thematic_analysis.py', [], '.', ['sentiment'],
+          ['data/bank_reviews_with_sentiment.parquet', 'config/themes.json'],
+          ['data/bank_reviews_themes_reviews.parquet', 'data/bank_reviews_themes_map.parquet',
+           'data/themes_distribution_per_bank.csv'],
+          ['scripts/token_store.py', 'scripts/rendering.py', 'scripts/dataset_io.py'], []),
+    Stage('load', 'scripts/data_insertion.py', [], '.', ['preprocess'],
+          ['data/bank_reviews_clean.parquet'], [],
+          ['scripts/database.py', 'scripts/database_setup.py', 'scripts/dataset_io.py',
+           'scripts/report_queries.py'],
+          ['DB_BACKEND', 'SQLITE_PATH', 'ORACLE_DSN', 'ORACLE_USER']),
+    Stage('load_analysis', 'scripts/data_insertion.py', ['--analysis'], '.', ['load', 'themes'],
+          ['data/bank_reviews_with_sentiment.parquet', 'data/bank_reviews_themes_reviews.parquet',
+           'data/bank_reviews_themes_map.parquet'], [],
+          ['scripts/database.py', 'scripts/database_setup.py', 'scripts/dataset_io.py',
+           'scripts/report_queries.py'],
+          ['DB_BACKEND', 'SQLITE_PATH', 'ORACLE_DSN', 'ORACLE_USER']),
+    Stage('insights', 'scripts/insights.py', [], 'scripts', ['preprocess'],
+          ['data/bank_reviews_clean.parquet'], [],
+          ['scripts/rendering.py', 'scripts/dataset_io.py', 'scripts/report_queries.py', 'scripts/database.py'], []),
+]
+
+def root_path(path):
+    return os.path.join(ROOT_DIR, path)
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(root_path(path), 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def stage_hash(stage):
+    """Hash of everything a stage reads: input files, its code, arguments and relevant environment"""
+    parts = {
+        'inputs': {path: file_digest(path) if os.path.exists(root_path(path)) else None for path in stage.inputs},
+        'code': {path: file_digest(path) for path in [stage.script] + stage.code},
+        'args': stage.args,
+        'env': {name: os.getenv(name) for name in stage.env}
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+def stamp_path(stage):
+    return root_path(os.path.join(STAMP_DIR, f"{stage.name}.json"))
+
+def is_fresh(stage, digest):
+    """True when the stage last ran on the same inputs and its outputs are still there"""
+    try:
+        with open(stamp_path(stage), encoding='utf-8') as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return stamp.get('hash') == digest and all(os.path.exists(root_path(path)) for path in stage.outputs)
+
+def write_stamp(stage, digest):
+    os.makedirs(root_path(STAMP_DIR), exist_ok=True)
+    with open(stamp_path(stage), 'w', encoding='utf-8') as f:
+        json.dump({'hash': digest, 'outputs': stage.outputs}, f, indent=2)
+
+def run_stage(stage, force=False):
+    """Run one stage unless its stamp matches; returns 'ran' or 'cached'"""
+    digest = stage_hash(stage)
+    if not force and is_fresh(stage, digest):
+        logger.info(f"⏭️ {stage.name}: inputs unchanged, skipping")
+        return 'cached'
+
+    logger.info(f"▶️ {stage.name}: running {stage.script}")
+    subprocess.run([sys.executable, root_path(stage.script), *stage.args], cwd=root_path(stage.cwd), check=True)
+    write_stamp(stage, digest)
+    logger.info(f"✅ {stage.name}: done")
+    return 'ran'
+
+def run_pipeline(stages=STAGES, force=(), workers=PIPELINE_WORKERS):
+    """
+    Run stages as a DAG: each stage starts once its dependencies succeed, and stages with
+    no dependency between them run in parallel. force names stages to rerun regardless of
+    their stamps ('all' forces every stage). Returns {stage name: 'ran' | 'cached' | 'failed' | 'skipped'}.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    unknown = {dep for stage in stages for dep in stage.deps if dep not in by_name}
+    if unknown:
+        raise ValueError(f"Unknown stage dependencies: {sorted(unknown)}")
+    status = {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while len(status) < len(stages):
+            settled = len(status)
+            for stage in stages:
+                if stage.name in status or stage.name in running.values():
+                    continue
+                dep_status = [status.get(dep) for dep in stage.deps]
+                if any(state in ('failed', 'skipped') for state in dep_status):
+                    logger.warning(f"⚠️ {stage.name}: skipped because a dependency failed")
+                    status[stage.name] = 'skipped'
+                elif all(state in ('ran', 'cached') for state in dep_status):
+                    running[executor.submit(run_stage, by_name[stage.name],
+                                            'all' in force or stage.name in force)] = stage.name
+
+            if not running:
+                if len(status) == settled:
+                    raise ValueError("Stage dependencies form a cycle")
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    status[name] = future.result()
+                except Exception as e:
+                    logger.error(f"🚨 {name} failed: {str(e)}")
+                    status[name] = 'failed'
+
+    return status
+
+def main():
+    # Pass --force to rerun every stage, or --force=scrape,sentiment for specific ones
+    force = set()
+    for arg in sys.argv[1:]:
+        if arg == '--force':
+            force.add('all')
+        elif arg.startswith('--force='):
+            force.update(name for name in arg.split('=', 1)[1].split(',') if name)
+
+    status = run_pipeline(force=force)
+    for name, state in status.items():
+        logger.info(f"{name}: {state}")
+    if any(state in ('failed', 'skipped') for state in status.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
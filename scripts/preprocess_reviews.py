@@ -6,50 +6,132 @@ import nltk
 nltk.download('punkt')
 nltk.download('stopwords')
 import os
+import sys
+from functools import lru_cache
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataset_io import RAW_PATH, CLEAN_PATH, DatasetWriter, dataset_columns, iter_dataset, read_dataset, write_dataset
 
 # Download NLTK resources
 nltk.download('punkt')
 nltk.download('stopwords')
 nltk.download('punkt_tab')
 
+# Patterns shared by clean_text and the batch cleaner
+NON_ALPHA_PATTERN = re.compile(r'[^a-zA-Z\s]')
+
+# word_tokenize keeps letter-only text intact apart from these Treebank
+# contractions, which it splits into two tokens
+TREEBANK_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+
+@lru_cache(maxsize=None)
+def get_stop_words():
+    """Load the English stopword set once per process"""
+    return frozenset(stopwords.words('english'))
+
 def clean_text(text):
     """Clean review text"""
     if not isinstance(text, str):
         return ""
     
     # Remove special characters and numbers
-    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    text = NON_ALPHA_PATTERN.sub('', text)
     
     # Convert to lowercase
     text = text.lower()
     
     # Tokenize and remove stopwords
     tokens = word_tokenize(text)
-    stop_words = set(stopwords.words('english'))
+    stop_words = get_stop_words()
     tokens = [word for word in tokens if word not in stop_words]
     
     return ' '.join(tokens)
 
-def preprocess_data(input_file, output_file):
+def clean_texts(texts):
+    """Clean a whole Series or list of reviews, matching clean_text row for row"""
+    texts = texts if isinstance(texts, pd.Series) else pd.Series(list(texts), dtype=object)
+    is_text = texts.map(lambda value: isinstance(value, str))
+    
+    # Vectorized character filtering and lowercasing
+    cleaned = texts[is_text].str.replace(NON_ALPHA_PATTERN, '', regex=True).str.lower()
+    
+    # Letter-only text needs no Treebank rules beyond the contraction splits
+    stop_words = get_stop_words()
+    splits = TREEBANK_SPLITS
+    
+    def drop_stop_words(text):
+        tokens = []
+        for word in text.split():
+            for token in splits.get(word, (word,)):
+                if token not in stop_words:
+                    tokens.append(token)
+        return ' '.join(tokens)
+    
+    result = pd.Series('', index=texts.index, dtype=object)
+    result[is_text] = [drop_stop_words(text) for text in cleaned]
+    return result
+
+def preprocess_chunk(df):
+    """Clean review text and normalize dates for one frame or chunk"""
+    # Clean review text
+    df['cleaned_review'] = clean_texts(df['review'])
+    
+    # Ensure proper date format (stored as date32)
+    df['date'] = pd.to_datetime(df['date']).dt.date
+    return df
+
+def preprocess_data(input_file, output_file, export_csv=False):
     """Preprocess the scraped data"""
     # Create data directory if not exists
     os.makedirs('data', exist_ok=True)
     
     # Load data
-    df = pd.read_csv(input_file)
+    df = read_dataset(input_file)
     
-    # Clean review text
-    df['cleaned_review'] = df['review'].apply(clean_text)
-    
-    # Ensure proper date format
-    df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
+    df = preprocess_chunk(df)
     
     # Save cleaned data
-    df.to_csv(output_file, index=False)
+    write_dataset(df, output_file, export_csv=export_csv)
     print(f"Preprocessed data saved to {output_file}")
 
+def preprocess_data_streaming(input_file, output_file, chunk_size=100000, workers=None, export_csv=False):
+    """Preprocess the scraped data chunk by chunk across a process pool"""
+    os.makedirs('data', exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    
+    # Cap in-flight chunks so memory stays bounded regardless of input size
+    max_pending = workers * 2
+    pending = deque()
+    
+    # An empty input still leaves a dataset with the expected columns
+    columns = dataset_columns(input_file) + ['cleaned_review']
+    with DatasetWriter(output_file, export_csv=export_csv, columns=columns) as writer:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk in iter_dataset(input_file, batch_size=chunk_size):
+                pending.append(executor.submit(preprocess_chunk, chunk))
+                if len(pending) >= max_pending:
+                    writer.write(pending.popleft().result())
+            
+            # Drain remaining chunks in submission order
+            while pending:
+                writer.write(pending.popleft().result())
+        total_rows = writer.rows
+    
+    print(f"Preprocessed {total_rows} rows saved to {output_file}")
+
 if __name__ == "__main__":
-    preprocess_data(
-        input_file='data/bank_reviews_raw.csv',
-        output_file='data/bank_reviews_clean.csv'
+    # Pass --stream to process large dumps in chunks across all cores
+    preprocess = preprocess_data_streaming if '--stream' in sys.argv else preprocess_data
+    # Pass --csv to also write bank_reviews_clean.csv
+    preprocess(
+        input_file=RAW_PATH,
+        output_file=CLEAN_PATH,
+        export_csv='--csv' in sys.argv
     )
\ No newline at end of file
@@ -0,0 +1,115 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import os
+import json
+import hashlib
+import logging
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib.pyplot as plt
+import seaborn as sns
+from wordcloud import WordCloud
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RENDER_WORKERS = int(os.getenv('RENDER_WORKERS', '0')) or os.cpu_count()  # Processes used to draw figures
+MANIFEST_NAME = '.render_manifest.json'  # Per output directory: file name -> hash of the data last drawn
+
+# A figure to draw: a module-level render function, its output path and the data it is drawn from
+RenderJob = namedtuple('RenderJob', ['render', 'path', 'params'])
+
+def render_keyword_bar(path, keywords, title):
+    """Horizontal bar chart of (word, count) pairs"""
+    words, counts = zip(*keywords)
+    plt.figure(figsize=(8, 5))
+    sns.barplot(x=list(counts), y=list(words), palette='viridis')
+    plt.title(title)
+    plt.xlabel('Frequency')
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+def render_count_bar(path, counts, title):
+    """Horizontal bar chart of (label, count) pairs, already sorted by count"""
+    labels, values = zip(*counts)
+    plt.figure(figsize=(10, 5))
+    sns.barplot(x=list(values), y=list(labels))
+    plt.xlabel('count')
+    plt.title(title)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+def render_wordcloud(path, frequencies, title, dpi=None, bbox_inches=None, title_pad=None):
+    """Word cloud drawn from precomputed {word: count} frequencies"""
+    wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(frequencies)
+    plt.figure(figsize=(10, 5))
+    plt.imshow(wordcloud, interpolation='bilinear')
+    plt.axis('off')
+    plt.title(title, pad=title_pad)
+    plt.savefig(path, dpi=dpi or 'figure', bbox_inches=bbox_inches)
+    plt.close()
+
+def run_job(job):
+    job.render(job.path, **job.params)
+    return job.path
+
+def job_hash(job):
+    payload = json.dumps([job.render.__name__, job.params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def manifest_path(path):
+    return os.path.join(os.path.dirname(path) or '.', MANIFEST_NAME)
+
+def load_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def render_jobs(jobs, workers=RENDER_WORKERS, force=False):
+    """Draw jobs in a process pool, skipping figures whose data hash matches the last render"""
+    manifests = {}
+    pending = []
+    for job in jobs:
+        manifest = manifests.setdefault(manifest_path(job.path), load_manifest(manifest_path(job.path)))
+        digest = job_hash(job)
+        name = os.path.basename(job.path)
+        if not force and manifest.get(name) == digest and os.path.exists(job.path):
+            continue
+        pending.append((job, digest))
+
+    logger.info(f"Rendering {len(pending)} of {len(jobs)} figures ({len(jobs) - len(pending)} unchanged)")
+    rendered = {}
+    if workers <= 1 or len(pending) <= 1:
+        for job, digest in pending:
+            try:
+                run_job(job)
+                rendered[job.path] = digest
+            except Exception as e:
+                logger.error(f"Render failed for {job.path}: {str(e)}")
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            futures = {executor.submit(run_job, job): (job, digest) for job, digest in pending}
+            for future in as_completed(futures):
+                job, digest = futures[future]
+                try:
+                    future.result()
+                    rendered[job.path] = digest
+                except Exception as e:
+                    logger.error(f"Render failed for {job.path}: {str(e)}")
+
+    # Record hashes only for figures that were actually written
+    for path, digest in rendered.items():
+        manifests[manifest_path(path)][os.path.basename(path)] = digest
+    for path, manifest in manifests.items():
+        if rendered:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return list(rendered)
@@ -0,0 +1,127 @@
+import os
+import time
+import logging
+import threading
+import pandas as pd
+from database import get_dialect, get_database_identity
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_TTL = float(os.getenv('REPORT_CACHE_TTL', '300'))  # Seconds an aggregate stays cached
+# Touched by the loader entry points after a load; cached aggregates older than it are recomputed, also across processes
+LOAD_MARKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', '.last_load')
+
+# Same scale as sentiment_analysis: positive=1, negative=0, neutral=0.5
+SENTIMENT_NUMERIC_SQL = """
+    CASE r.sentiment WHEN 'POSITIVE' THEN 1 WHEN 'NEGATIVE' THEN 0 WHEN 'NEUTRAL' THEN 0.5 END
+"""
+
+def last_load_time(path=LOAD_MARKER_PATH):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+def mark_load_complete(path=LOAD_MARKER_PATH):
+    """Record that the database changed, invalidating cached aggregates"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8'):
+        os.utime(path)
+    REPORT_CACHE.clear()
+
+class QueryCache:
+    """Aggregate results kept for ttl seconds, or until the next completed load"""
+
+    def __init__(self, ttl=REPORT_CACHE_TTL, marker_path=LOAD_MARKER_PATH):
+        self.ttl = ttl
+        self.marker_path = marker_path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        marker = last_load_time(self.marker_path)
+        now = time.monotonic()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > now and entry[1] >= marker:
+                self.hits += 1
+                return entry[2].copy()
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            # Stamped with the marker seen before the query, so a load during it still invalidates
+            self.entries[key] = (now + self.ttl, marker, value)
+        return value.copy()
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self):
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+REPORT_CACHE = QueryCache()
+
+def run_query(connection, sql, columns, params=None):
+    cursor = connection.cursor()
+    cursor.execute(sql, params or {})
+    return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+def cached_query(connection, name, compute, cache=REPORT_CACHE):
+    if cache is None:
+        return compute()
+    return cache.get((name, get_dialect(connection), get_database_identity(connection)), compute)
+
+def bank_sentiment(connection, cache=REPORT_CACHE):
+    """Mean numeric sentiment and scored review count per bank"""
+    def compute():
+        df = run_query(connection, f"""
+            SELECT b.bank_name, AVG({SENTIMENT_NUMERIC_SQL}), COUNT(r.sentiment)
+            FROM reviews r JOIN banks b ON b.bank_id = r.bank_id
+            WHERE r.sentiment IS NOT NULL
+            GROUP BY b.bank_name
+            ORDER BY b.bank_name
+        """, ['bank', 'sentiment_numeric', 'reviews'])
+        df['sentiment_numeric'] = df['sentiment_numeric'].astype(float)
+        return df
+    return cached_query(connection, 'bank_sentiment', compute, cache)
+
+def rating_sentiment(connection, cache=REPORT_CACHE):
+    """Mean numeric sentiment per bank (rows) and rating (columns)"""
+    def compute():
+        df = run_query(connection, f"""
+            SELECT b.bank_name, r.rating, AVG({SENTIMENT_NUMERIC_SQL})
+            FROM reviews r JOIN banks b ON b.bank_id = r.bank_id
+            WHERE r.sentiment IS NOT NULL
+            GROUP BY b.bank_name, r.rating
+        """, ['bank', 'rating', 'sentiment_numeric'])
+        df['sentiment_numeric'] = df['sentiment_numeric'].astype(float)
+        return df.pivot(index='bank', columns='rating', values='sentiment_numeric').sort_index()
+    return cached_query(connection, 'rating_sentiment', compute, cache)
+
+def rating_counts(connection, cache=REPORT_CACHE):
+    """Review count per rating"""
+    def compute():
+        return run_query(connection, """
+            SELECT rating, COUNT(*) FROM reviews GROUP BY rating ORDER BY rating
+        """, ['rating', 'count'])
+    return cached_query(connection, 'rating_counts', compute, cache)
+
+def theme_counts(connection, cache=REPORT_CACHE):
+    """Reviews per bank and theme, most frequent first within each bank"""
+    def compute():
+        return run_query(connection, """
+            SELECT b.bank_name, t.theme_name, COUNT(*) AS review_count
+            FROM review_themes rt
+            JOIN reviews r ON r.review_id = rt.review_id
+            JOIN banks b ON b.bank_id = r.bank_id
+            JOIN theme t ON t.theme_id = rt.theme_id
+            GROUP BY b.bank_name, t.theme_name
+            ORDER BY b.bank_name, review_count DESC, t.theme_name
+        """, ['bank', 'theme', 'count'])
+    return cached_query(connection, 'theme_counts', compute, cache)
@@ -1,102 +1,335 @@
-from google_play_scraper import app, Sort, reviews_all
+from google_play_scraper import app, Sort, reviews
 import pandas as pd
 import os
+import json
+import hashlib
 import time
+import random
+import sys
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataset_io import RAW_PATH, DatasetWriter
 
 # Ensure data folder exists
 os.makedirs("data", exist_ok=True)
 
-# Updated bank app details with verified package names
-banks = {
-    "Commercial Bank of Ethiopia": "com.combanketh.mobilebanking",
-    "Bank of Abyssinia": "com.boa.boaMobileBanking", 
-    "Dashen Bank": "com.dashen.dashensuperapp"
-}
+# Bank name -> Play Store package name for every tracked app
+APPS_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'apps.json')
+SCRAPE_CONCURRENCY = int(os.getenv('SCRAPE_CONCURRENCY', '4'))  # Apps scraped at the same time
+SCRAPE_RATE = float(os.getenv('SCRAPE_RATE', '1.0'))  # Requests per second shared by all workers
+SCRAPE_RETRIES = int(os.getenv('SCRAPE_RETRIES', '3'))  # Extra attempts per app after a failure
+SCRAPE_BACKOFF = float(os.getenv('SCRAPE_BACKOFF', '2.0'))  # Base retry delay in seconds, doubled per attempt
+SCRAPE_PAGE_SIZE = 200  # Reviews requested per page
+SCRAPE_STATE_PATH = 'data/scrape_state.json'  # App id -> newest review already scraped
+SCRAPE_PROGRESS_PATH = 'data/scrape_progress.json'  # Apps finished by an interrupted run, for resuming
+RAW_JSONL_PATH = 'data/bank_reviews_raw.jsonl'  # Append-only sink written page by page
+RAW_CSV_PATH = 'data/bank_reviews_raw.csv'  # Raw reviews from runs before the sink existed
+RAW_COLUMNS = ['review', 'rating', 'date', 'bank', 'source']
 
-def scrape_app_reviews(app_id, bank_name, max_reviews=400):
+def load_apps(path=APPS_CONFIG):
+    """Load the {bank name: app id} mapping from config"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all scraper workers"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def fetch_with_retries(fetch, bank_name, limiter, retries, backoff, *args, **kwargs):
+    """Call fetch under the rate limiter, retrying failures with exponential backoff and jitter"""
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fetch(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt + random.uniform(0, backoff)
+            print(f"Error fetching reviews for {bank_name} (attempt {attempt + 1}): {str(e)}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def review_time(review):
+    review_date = review.get('at')
+    if isinstance(review_date, str):
+        review_date = datetime.strptime(review_date, '%Y-%m-%d %H:%M:%S')
+    return review_date
+
+def high_water_mark(raw_reviews):
+    """High-water mark for a newest-first list of raw reviews"""
+    newest = raw_reviews[0]
+    return {'review_id': newest.get('reviewId'), 'at': review_time(newest).isoformat()}
+
+def is_scraped(review, high_water):
+    """True once paging reaches the high-water review or anything older than it"""
+    if not high_water:
+        return False
+    if review.get('reviewId') is not None and review.get('reviewId') == high_water.get('review_id'):
+        return True
+    return review_time(review) < datetime.fromisoformat(high_water['at'])
+
+def iter_review_pages(app_id, bank_name, max_reviews=400, fetch=None, limiter=None,
+                      retries=0, backoff=SCRAPE_BACKOFF, high_water=None, page_size=SCRAPE_PAGE_SIZE):
     """
-    Scrape reviews for a given app ID
+    Yield an app's newest reviews page by page using continuation tokens, stopping at
+    max_reviews, at the high-water mark or at the last page. max_reviews=None means no cap.
+    fetch defaults to google_play_scraper.reviews; pass a stub to run offline.
+    Raises once a page still fails after retries.
     """
-    try:
-        # Get all available reviews (no continuation token in current version)
-        all_reviews = reviews_all(
-            app_id,
+    fetch = fetch or reviews
+    fetched = 0
+    token = None
+    
+    while max_reviews is None or fetched < max_reviews:
+        count = page_size if max_reviews is None else min(page_size, max_reviews - fetched)
+        page, token = fetch_with_retries(
+            fetch, bank_name, limiter, retries, backoff, app_id,
             lang='en',
             country='et',
             sort=Sort.NEWEST,
-            count=max_reviews  # Limit directly in the API call
+            count=count,
+            continuation_token=token
         )
         
-        return all_reviews[:max_reviews]
-    
+        new = []
+        reached_mark = False
+        for review in page:
+            if is_scraped(review, high_water):
+                reached_mark = True
+                break
+            new.append(review)
+        if max_reviews is not None:
+            new = new[:max_reviews - fetched]
+        fetched += len(new)
+        if new:
+            yield new
+        
+        # Stop at the mark, or when an exhausted listing returns an empty page or a token without a next page
+        if reached_mark or not page or token is None or getattr(token, 'token', True) is None:
+            return
+
+class ReviewSink:
+    """
+    Append-only JSONL sink for processed reviews that skips (review, bank) pairs already written.
+    Only 16-byte digests of written pairs are kept in memory; path=None keeps rows in memory instead.
+    """
+
+    def __init__(self, path=None, resume=False):
+        self.path = path
+        self.rows = [] if path is None else None
+        self.seen = set()
+        self.written = 0
+        self.lock = threading.Lock()
+        if path is None:
+            return
+        if resume and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.seed(json.loads(line) for line in f if line.strip())
+        else:
+            open(path, 'w', encoding='utf-8').close()
+
+    @staticmethod
+    def make_key(row):
+        text = f"{row.get('bank')}\x1f{row.get('review')}"
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    def seed(self, rows):
+        """Mark rows as already written without writing them"""
+        with self.lock:
+            self.seen.update(self.make_key(row) for row in rows)
+
+    def write(self, rows):
+        """Append rows not seen before, dropping empty reviews; returns how many were written"""
+        with self.lock:
+            new = []
+            for row in rows:
+                review = row.get('review')
+                if not isinstance(review, str) or not review.strip():
+                    continue
+                key = self.make_key(row)
+                if key not in self.seen:
+                    self.seen.add(key)
+                    new.append(row)
+            
+            if self.path is None:
+                self.rows.extend(new)
+            elif new:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in new))
+            self.written += len(new)
+            return len(new)
+
+def export_sink(jsonl_path=RAW_JSONL_PATH, path=RAW_PATH, export_csv=False, batch_size=50000):
+    """Rewrite the raw Parquet dataset from the JSONL sink, batch_size lines at a time"""
+    with DatasetWriter(path, export_csv=export_csv, columns=RAW_COLUMNS) as writer:
+        with open(jsonl_path, encoding='utf-8') as source:
+            batch = []
+            for line in source:
+                if line.strip():
+                    batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    writer.write(pd.DataFrame(batch, columns=RAW_COLUMNS))
+                    batch = []
+            if batch:
+                writer.write(pd.DataFrame(batch, columns=RAW_COLUMNS))
+        return writer.rows
+
+def scrape_app_to_sink(app_id, bank_name, sink, max_reviews=400, fetch=None, limiter=None,
+                       retries=0, high_water=None):
+    """
+    Stream an app's pages through process_reviews into the sink.
+    Returns (reviews written, complete, high-water mark of this scrape or None).
+    """
+    written = 0
+    mark = None
+    try:
+        for page in iter_review_pages(app_id, bank_name, max_reviews, fetch, limiter, retries,
+                                      high_water=high_water):
+            mark = mark or high_water_mark(page)
+            written += sink.write(process_reviews(page, bank_name))
     except Exception as e:
         print(f"Error fetching reviews for {bank_name}: {str(e)}")
-        return []
+        return written, False, None
+    return written, True, mark
+
+def load_scrape_state(path=SCRAPE_STATE_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_scrape_state(state, path=SCRAPE_STATE_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
 
 def process_reviews(raw_reviews, bank_name):
     """
-    Process raw reviews into structured format with error handling
+    Process raw reviews into structured format with error handling, one review at a time
     """
-    processed = []
-    
     for review in raw_reviews:
         try:
             review_date = review.get('at', datetime.now())
             if isinstance(review_date, str):
                 review_date = datetime.strptime(review_date, '%Y-%m-%d %H:%M:%S')
                 
-            processed.append({
+            yield {
                 'review': review.get('content', ''),
                 'rating': review.get('score', 0),
                 'date': review_date.strftime('%Y-%m-%d'),
                 'bank': bank_name,
                 'source': 'Google Play'
-            })
+            }
         except Exception as e:
             print(f"Error processing review: {str(e)}")
             continue
-            
-    return processed
 
-def main():
-    all_reviews = []
+def scrape_apps(apps, max_reviews=400, concurrency=SCRAPE_CONCURRENCY, rate=SCRAPE_RATE,
+                retries=SCRAPE_RETRIES, fetch=None, state=None, sink=None, skip=(), on_complete=None):
+    """
+    Scrape every app in a thread pool under one shared rate limit, writing pages to the sink
+    (an in-memory ReviewSink by default) as they arrive. Apps whose id is in skip are left out.
+    With a state dict, apps that have a high-water mark fetch only newer reviews (uncapped)
+    and the marks of fully scraped apps are advanced in place; on_complete(app_id) is then called.
+    Returns {bank name: reviews written} in config order.
+    """
+    sink = sink if sink is not None else ReviewSink()
+    limiter = TokenBucket(rate, capacity=max(1, concurrency))
+    results = {}
     
-    for bank_name, app_id in banks.items():
-        print(f"\nScraping reviews for {bank_name}...")
-        
-        # Scrape reviews
-        bank_reviews = scrape_app_reviews(app_id, bank_name)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {}
+        for bank_name, app_id in apps.items():
+            if app_id in skip:
+                continue
+            print(f"Scraping reviews for {bank_name}...")
+            high_water = state.get(app_id) if state is not None else None
+            futures[executor.submit(scrape_app_to_sink, app_id, bank_name, sink,
+                                    None if high_water else max_reviews, fetch, limiter, retries,
+                                    high_water)] = (bank_name, app_id)
         
-        if not bank_reviews:
-            print(f"No reviews found for {bank_name}")
-            continue
+        for future in as_completed(futures):
+            bank_name, app_id = futures[future]
+            written, complete, mark = future.result()
+            results[bank_name] = written
             
-        # Process reviews
-        processed = process_reviews(bank_reviews, bank_name)
-        all_reviews.extend(processed)
-        print(f"Successfully collected {len(processed)} reviews for {bank_name}")
-        
-        # Rate limiting
-        time.sleep(5)
+            if written:
+                print(f"Successfully collected {written} reviews for {bank_name}")
+            else:
+                print(f"No reviews found for {bank_name}")
+            
+            # A partial scrape keeps the old mark so the gap is fetched next run
+            if complete:
+                if state is not None and mark:
+                    state[app_id] = mark
+                if on_complete is not None:
+                    on_complete(app_id)
     
-    if not all_reviews:
-        print("\nFailed to collect any reviews. Exiting.")
-        return
-        
-    # Create DataFrame
-    df = pd.DataFrame(all_reviews)
+    return {bank_name: results[bank_name] for bank_name in apps if bank_name in results}
+
+def main():
+    # Pass --incremental to fetch only reviews newer than the last run and add them to the sink
+    incremental = '--incremental' in sys.argv
+    state = load_scrape_state() if incremental else None
+    
+    # A progress file means the last run stopped early: keep its sink and skip finished apps.
+    # It is written before any page, so a run interrupted during its first app still resumes
+    resume = os.path.exists(SCRAPE_PROGRESS_PATH) or incremental
+    progress = load_scrape_state(SCRAPE_PROGRESS_PATH)
+    progress.setdefault('completed', [])
+    if progress['completed']:
+        print(f"Resuming run: {len(progress['completed'])} apps already scraped")
+    
+    migrate = incremental and not os.path.exists(RAW_JSONL_PATH) and os.path.exists(RAW_CSV_PATH)
+    sink = ReviewSink(RAW_JSONL_PATH, resume=resume)
+    save_scrape_state(progress, SCRAPE_PROGRESS_PATH)
+    if migrate:
+        # Carry reviews from CSV-only runs into the sink before it becomes the source of the CSV
+        for chunk in pd.read_csv(RAW_CSV_PATH, chunksize=10000):
+            sink.write(chunk.to_dict('records'))
+    
+    def on_complete(app_id):
+        progress['completed'].append(app_id)
+        save_scrape_state(progress, SCRAPE_PROGRESS_PATH)
+        # Marks only move past reviews that are already in the sink
+        if incremental:
+            save_scrape_state(state)
     
-    # Data cleaning
-    df = df.drop_duplicates(subset=['review', 'bank'])
-    df = df[df['review'].notna() & (df['review'].str.strip() != '')]
+    apps = load_apps()
+    results = scrape_apps(apps, state=state, sink=sink, skip=set(progress['completed']), on_complete=on_complete)
+    print(f"\nNew reviews written this run: {sum(results.values())}")
     
-    print(f"\nTotal reviews collected: {len(df)}")
+    # Pass --csv to also write bank_reviews_raw.csv
+    rows = export_sink(export_csv='--csv' in sys.argv)
+    print(f"Total reviews in {RAW_PATH}: {rows}")
     
-    # Save to CSV
-    csv_path = "data/bank_reviews_raw.csv"
-    df.to_csv(csv_path, index=False)
-    print(f"Data saved to {csv_path}")
+    unfinished = [bank_name for bank_name, app_id in apps.items() if app_id not in progress['completed']]
+    if unfinished:
+        print(f"Run incomplete for {', '.join(unfinished)}; rerun to resume")
+        # Non-zero so the pipeline does not stamp a partial scrape as done
+        sys.exit(1)
+    elif os.path.exists(SCRAPE_PROGRESS_PATH):
+        os.remove(SCRAPE_PROGRESS_PATH)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
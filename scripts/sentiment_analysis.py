@@ -1,73 +1,325 @@
-import pandas as pd
-from transformers import pipeline
+from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
 from tqdm import tqdm
 import numpy as np
 import logging
+import torch
+import hashlib
+import shutil
+import sqlite3
+import time
+import re
+import os
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataset_io import CLEAN_PATH, SENTIMENT_PATH, read_dataset, write_dataset
+import report_queries
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+MAX_LENGTH = 512
+TOKEN_BUDGET = 8192  # Padded tokens per batch for length-bucketed batching
+CACHE_PATH = 'data/sentiment_cache.db'
+CACHE_MAX_ENTRIES = 2_000_000
+SENTIMENT_WORKERS = int(os.getenv('SENTIMENT_WORKERS', '1'))  # Worker processes for CPU inference
+SENTIMENT_THREADS = int(os.getenv('SENTIMENT_THREADS', '0')) or None  # Torch threads per worker
+SENTIMENT_BACKEND = os.getenv('SENTIMENT_BACKEND', 'torch')  # 'torch', 'int8' or 'onnx'
+ONNX_CACHE_DIR = os.getenv('ONNX_CACHE_DIR', 'data/onnx')  # Exported ONNX models, one directory per model
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+class SentimentCache:
+    """On-disk sentiment results keyed by model name and normalized review text hash"""
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS sentiment_cache (
+                cache_key TEXT PRIMARY KEY,
+                label TEXT NOT NULL,
+                score REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_sentiment_cache_last_used ON sentiment_cache (last_used)")
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(model_name, text):
+        normalized = WHITESPACE_PATTERN.sub(' ', str(text)).strip()
+        return f"{model_name}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+    def get_many(self, keys, chunk_size=500):
+        """Return {key: (label, score)} for cached keys and count hits/misses"""
+        unique_keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(unique_keys), chunk_size):
+            chunk = unique_keys[start:start + chunk_size]
+            placeholders = ', '.join('?' for _ in chunk)
+            rows = self.connection.execute(
+                f"SELECT cache_key, label, score FROM sentiment_cache WHERE cache_key IN ({placeholders})", chunk
+            ).fetchall()
+            found.update({key: (label, score) for key, label, score in rows})
+
+        # Refresh recency so eviction drops the least recently used entries
+        now = time.time()
+        self.connection.executemany("UPDATE sentiment_cache SET last_used = ? WHERE cache_key = ?",
+                                    [(now, key) for key in found])
+        self.connection.commit()
+
+        self.hits += sum(1 for key in keys if key in found)
+        self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, results):
+        """Store {key: (label, score)} and evict the oldest entries beyond max_entries"""
+        now = time.time()
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO sentiment_cache (cache_key, label, score, last_used) VALUES (?, ?, ?, ?)",
+            [(key, label, float(score), now) for key, (label, score) in results.items()]
+        )
+        overflow = self.connection.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self.connection.execute("""
+                DELETE FROM sentiment_cache WHERE cache_key IN (
+                    SELECT cache_key FROM sentiment_cache ORDER BY last_used LIMIT ?
+                )
+            """, (overflow,))
+            logger.info(f"Evicted {overflow} sentiment cache entries.")
+        self.connection.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
+
+    def close(self):
+        self.connection.close()
+
 def load_data(file_path):
     """Load and validate review data"""
     try:
-        df = pd.read_csv(file_path)
+        df = read_dataset(file_path)
         
         # Validate required columns
         required_cols = ['review', 'rating', 'date', 'bank']
         if not all(col in df.columns for col in required_cols):
             raise ValueError(f"Missing required columns. Needed: {required_cols}")
             
-        # Ensure review column contains strings
-        df['review'] = df['review'].astype(str)
+        # Typed string column; only missing reviews need filling
+        df['review'] = df['review'].fillna('')
         
         return df
     except Exception as e:
         logger.error(f"Error loading data: {e}")
         raise
 
-def analyze_sentiment(df, batch_size=32):
-    """Perform sentiment analysis with robust error handling"""
+def export_onnx_model(model_name, cache_dir=ONNX_CACHE_DIR):
+    """Export model_name to ONNX on first use and return the directory every later load reads from"""
     try:
-        logger.info("Initializing sentiment analysis pipeline...")
-        
-        # Initialize pipeline with error handling
-        sentiment_pipeline = pipeline(
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+    except ImportError:
+        logger.error("ONNX backend needs optimum[onnxruntime]. Run: pip install optimum[onnxruntime]")
+        raise
+
+    path = os.path.join(cache_dir, re.sub(r'[^\w.-]+', '_', model_name))
+    if os.path.isfile(os.path.join(path, 'model.onnx')):
+        return path
+
+    # Export beside the target and rename, so workers exporting at once never read a partial model
+    staging = f"{path}.tmp-{os.getpid()}"
+    ORTModelForSequenceClassification.from_pretrained(model_name, export=True).save_pretrained(staging)
+    try:
+        os.rename(staging, path)
+        logger.info(f"Exported {model_name} to ONNX in {path}")
+    except OSError:
+        # Another worker finished its export first
+        shutil.rmtree(staging, ignore_errors=True)
+    return path
+
+def load_sentiment_pipeline(model_name=MODEL_NAME, backend='torch'):
+    """Initialize the sentiment pipeline for a backend: 'torch' (fp32, GPU if available), 'int8' or 'onnx'"""
+    if backend == 'torch':
+        return pipeline(
             "sentiment-analysis",
-            model="distilbert-base-uncased-finetuned-sst-2-english",
+            model=model_name,
             device=0 if torch.cuda.is_available() else -1,  # Use GPU if available
             truncation=True,
             padding=True,
-            max_length=512
+            max_length=MAX_LENGTH
         )
+    
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if backend == 'int8':
+        # Dynamic int8 quantization of the Linear layers, CPU only
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model = torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend == 'onnx':
+        model_dir = export_onnx_model(model_name)
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        model = ORTModelForSequenceClassification.from_pretrained(model_dir)
+    else:
+        raise ValueError(f"Unknown sentiment backend: {backend}")
+    
+    return pipeline(
+        "sentiment-analysis",
+        model=model,
+        tokenizer=tokenizer,
+        device=-1,
+        truncation=True,
+        padding=True,
+        max_length=MAX_LENGTH
+    )
+
+def run_pipeline(sentiment_pipeline, batch, batched):
+    """Score one batch, returning (label, score) pairs"""
+    if batched:
+        results = sentiment_pipeline(batch, batch_size=len(batch))
+    else:
+        results = sentiment_pipeline(batch)
+    return [(result['label'], result['score']) for result in results]
+
+_worker_pipeline = None
+
+def init_sentiment_worker(model_name, threads, backend='torch'):
+    """Load the pipeline once per worker process with a fixed torch thread count"""
+    global _worker_pipeline
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    _worker_pipeline = load_sentiment_pipeline(model_name, backend)
+
+def score_batch(batch, batched):
+    """Score one batch inside a worker process"""
+    return run_pipeline(_worker_pipeline, batch, batched)
+
+def make_length_batches(lengths, token_budget, max_batch_size=256):
+    """Group row positions of similar token length so each padded batch fits the token budget"""
+    order = np.argsort(lengths, kind='stable')
+    batches = []
+    current = []
+    for position in order:
+        # Sorted ascending, so this row sets the padded length of the batch
+        padded_tokens = int(lengths[position]) * (len(current) + 1)
+        if current and (padded_tokens > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(position)
+    if current:
+        batches.append(current)
+    return batches
+
+def iter_fixed_batches(n_rows, batch_size):
+    """Row positions in file order, batch_size at a time"""
+    for i in range(0, n_rows, batch_size):
+        yield list(range(i, min(i + batch_size, n_rows)))
+
+def analyze_sentiment(df, batch_size=32, token_budget=None, model_name=MODEL_NAME, cache=None,
+                      workers=None, threads_per_worker=None, backend='torch'):
+    """Perform sentiment analysis with robust error handling"""
+    try:
+        reviews = df['review'].tolist()
+        sentiments = [None] * len(reviews)
+        scores = [None] * len(reviews)
         
-        sentiments = []
-        scores = []
+        # Serve cached reviews first; only misses reach the model
+        if cache is not None:
+            # Quantized backends drift slightly, so they get their own cache entries
+            cache_model = model_name if backend == 'torch' else f"{model_name}@{backend}"
+            keys = [cache.make_key(cache_model, review) for review in reviews]
+            cached = cache.get_many(keys)
+            for position, key in enumerate(keys):
+                if key in cached:
+                    sentiments[position], scores[position] = cached[key]
+            pending = [position for position, key in enumerate(keys) if key not in cached]
+            logger.info(f"Sentiment cache: {len(reviews) - len(pending)} hits, {len(pending)} misses")
+        else:
+            pending = list(range(len(reviews)))
         
-        # Process reviews in batches with progress tracking
-        logger.info("Starting sentiment analysis...")
-        for i in tqdm(range(0, len(df), batch_size), desc="Analyzing sentiment"):
-            batch = df['review'].iloc[i:i+batch_size].tolist()
+        scored = {}
+        if pending:
+            logger.info("Initializing sentiment analysis pipeline...")
+            pending_reviews = [reviews[position] for position in pending]
+            batched = bool(token_budget)
+            
+            # Initialize pipeline with error handling, in this process or once per worker
+            executor = None
+            if workers and workers > 1:
+                threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+                logger.info(f"Starting {workers} sentiment workers x {threads} torch threads...")
+                tokenizer = AutoTokenizer.from_pretrained(model_name)
+                if backend == 'onnx':
+                    # Export before the workers start so each one only loads the cached model
+                    export_onnx_model(model_name)
+                executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_sentiment_worker,
+                    initargs=(model_name, threads, backend)
+                )
+            else:
+                sentiment_pipeline = load_sentiment_pipeline(model_name, backend)
+                tokenizer = sentiment_pipeline.tokenizer
             
-            # Skip empty batches
-            if not batch:
-                continue
-                
             try:
-                results = sentiment_pipeline(batch)
+                # With a token budget, batch reviews of similar length and scatter results back by position
+                if token_budget:
+                    lengths = np.array([
+                        len(ids) for ids in
+                        tokenizer(pending_reviews, truncation=True, max_length=MAX_LENGTH)['input_ids']
+                    ])
+                    batches = make_length_batches(lengths, token_budget)
+                else:
+                    batches = list(iter_fixed_batches(len(pending), batch_size))
+                batches = [[pending[i] for i in batch_positions] for batch_positions in batches]
                 
-                for result in results:
-                    sentiments.append(result['label'])
-                    scores.append(result['score'])
-            except Exception as batch_error:
-                logger.warning(f"Error processing batch {i//batch_size}: {batch_error}")
-                # Fill with neutral sentiment if batch fails
-                sentiments.extend(['NEUTRAL'] * len(batch))
-                scores.extend([0.5] * len(batch))
+                # Queue every batch up front; workers pull from the pool's call queue
+                if executor:
+                    futures = [
+                        executor.submit(score_batch, [reviews[position] for position in positions], batched)
+                        for positions in batches
+                    ]
                 
+                # Process reviews in batches with progress tracking, collecting results in order
+                logger.info("Starting sentiment analysis...")
+                for batch_number, positions in enumerate(tqdm(batches, desc="Analyzing sentiment")):
+                    batch = [reviews[position] for position in positions]
+                    
+                    # Skip empty batches
+                    if not batch:
+                        continue
+                        
+                    try:
+                        if executor:
+                            labels = futures[batch_number].result()
+                        else:
+                            labels = run_pipeline(sentiment_pipeline, batch, batched)
+                        scored.update(zip(positions, labels))
+                    except Exception as batch_error:
+                        logger.warning(f"Error processing batch {batch_number}: {batch_error}")
+                        # Fill with neutral sentiment if batch fails
+                        labels = [('NEUTRAL', 0.5)] * len(batch)
+                    
+                    for position, (label, score) in zip(positions, labels):
+                        sentiments[position] = label
+                        scores[position] = score
+            finally:
+                if executor:
+                    executor.shutdown(cancel_futures=True)
+        
         # Handle case where analysis failed completely
-        if not sentiments:
+        if not reviews:
             raise RuntimeError("Sentiment analysis failed for all batches")
+        
+        # Failed batches are not cached so they are retried next run
+        if cache is not None and scored:
+            cache.put_many({keys[position]: label for position, label in scored.items()})
             
         df['sentiment'] = sentiments
         df['sentiment_score'] = scores
@@ -82,9 +334,16 @@ def analyze_sentiment(df, batch_size=32):
         logger.error(f"Sentiment analysis failed: {e}")
         raise
 
-def aggregate_sentiment(df):
-    """Aggregate sentiment results with error handling"""
+def aggregate_sentiment(df=None, connection=None):
+    """
+    Aggregate sentiment results with error handling. With a connection the means are
+    computed in the database from the loaded reviews instead of from df.
+    """
     try:
+        if connection is not None:
+            return report_queries.bank_sentiment(connection)[['bank', 'sentiment_numeric']], \
+                report_queries.rating_sentiment(connection)
+
         # Overall sentiment by bank
         bank_sentiment = df.groupby('bank')['sentiment_numeric'].mean().reset_index()
         
@@ -96,14 +355,14 @@ def aggregate_sentiment(df):
         logger.error(f"Aggregation failed: {e}")
         return None, None
 
-def save_results(df, output_file):
+def save_results(df, output_file, export_csv=False):
     """Save results with validation"""
     try:
         required_cols = ['review', 'rating', 'date', 'bank', 'sentiment', 'sentiment_score']
         if not all(col in df.columns for col in required_cols):
             raise ValueError(f"Missing required columns for output. Needed: {required_cols}")
             
-        df.to_csv(output_file, index=False)
+        write_dataset(df, output_file, export_csv=export_csv)
         logger.info(f"Results saved to {output_file}")
     except Exception as e:
         logger.error(f"Failed to save results: {e}")
@@ -112,21 +371,28 @@ def save_results(df, output_file):
 def main():
     try:
         # Input/output paths
-        input_file = 'data/bank_reviews_clean.csv'
-        output_file = 'data/bank_reviews_with_sentiment.csv'
+        input_file = CLEAN_PATH
+        output_file = SENTIMENT_PATH
         
         # Load data
         logger.info(f"Loading data from {input_file}")
         df = load_data(input_file)
         
-        # Analyze sentiment
-        df = analyze_sentiment(df)
+        # Analyze sentiment, reusing scores from earlier runs
+        cache = SentimentCache(CACHE_PATH)
+        try:
+            df = analyze_sentiment(df, token_budget=TOKEN_BUDGET, cache=cache,
+                                   workers=SENTIMENT_WORKERS, threads_per_worker=SENTIMENT_THREADS,
+                                   backend=SENTIMENT_BACKEND)
+            logger.info(f"Sentiment cache stats: {cache.stats()}")
+        finally:
+            cache.close()
         
         # Aggregate results
         bank_sentiment, rating_sentiment = aggregate_sentiment(df)
         
-        # Save results
-        save_results(df, output_file)
+        # Save results; pass --csv to also write bank_reviews_with_sentiment.csv
+        save_results(df, output_file, export_csv='--csv' in sys.argv)
         
         # Print summary
         logger.info("\nSentiment Analysis Summary:")
@@ -141,5 +407,4 @@ def main():
     return 
 
 if __name__ == "__main__":
-    import torch  # Import here to properly handle GPU availability
     exit(main())
\ No newline at end of file
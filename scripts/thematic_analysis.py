@@ -1,29 +1,60 @@
 import pandas as pd
 import spacy
+from spacy.lang.en.stop_words import STOP_WORDS
 from collections import Counter
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-import seaborn as sns
 import logging
 import os
+import re
+import sys
+import json
+import numpy as np
+from itertools import chain
+from functools import lru_cache
+from token_store import TokenStore
+from dataset_io import SENTIMENT_PATH, THEME_REVIEWS_PATH, THEME_MAP_PATH, read_dataset, write_dataset
+from rendering import RenderJob, render_jobs, render_count_bar, render_wordcloud
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load English language model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    logger.error("Spacy model 'en_core_web_sm' not found. Run: python -m spacy download en_core_web_sm")
-    raise
+THEMES_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'themes.json')
+WORD_PATTERN = re.compile(r'[a-z]+')
+OTHER_THEME = 'Other'
+THEMES_WORKERS = int(os.getenv('THEMES_WORKERS', '1'))  # spaCy processes for keyword extraction
+
+# Review table columns: output name -> (input column, default used when the column is missing)
+REVIEW_COLUMNS = {
+    'bank': ('bank', None), 'review_text': ('review', ''), 'sentiment': ('sentiment', 'UNKNOWN'),
+    'sentiment_label': ('sentiment_label', ''), 'sentiment_score': ('sentiment_score', '')
+}
+WIDE_COLUMNS = ['bank', 'review_id', 'theme', 'keywords', 'sentiment', 'review_text', 'sentiment_label', 'sentiment_score']
+
+# Components the keyword extractor needs: POS tags, lemmas and lexical stop/alpha flags
+KEYWORD_EXCLUDE = ['parser', 'ner']
+
+def load_spacy_model(**kwargs):
+    try:
+        return spacy.load("en_core_web_sm", **kwargs)
+    except OSError:
+        logger.error("Spacy model 'en_core_web_sm' not found. Run: python -m spacy download en_core_web_sm")
+        raise
+
+# Full pipeline, loaded on first use by the per-row extract_keywords only
+@lru_cache(maxsize=None)
+def get_nlp():
+    return load_spacy_model()
+
+@lru_cache(maxsize=None)
+def get_keyword_nlp():
+    return load_spacy_model(exclude=KEYWORD_EXCLUDE)
 
 # Extract keywords from text
 def extract_keywords(text, pos_tags=['NOUN', 'ADJ', 'VERB']):
     if not isinstance(text, str) or not text.strip():
         return []
     try:
-        doc = nlp(text)
+        doc = get_nlp()(text)
         return [
             token.lemma_.lower() for token in doc
             if token.pos_ in pos_tags and not token.is_stop and token.is_alpha and len(token) > 2
@@ -32,85 +63,158 @@ def extract_keywords(text, pos_tags=['NOUN', 'ADJ', 'VERB']):
         logger.warning(f"Error processing text: {str(e)}")
         return []
 
-# Perform thematic analysis
-def analyze_themes(df):
-    themes = {
-        'bank': [], 'review_id': [], 'theme': [], 'keywords': [],
-        'sentiment': [], 'review_text': [], 'sentiment_label': [], 'sentiment_score': []
-    }
-
-    theme_mapping = {
-        'Account Access': ['login', 'password', 'account', 'access', 'authenticate', 'pin', 'security'],
-        'Transaction Issues': ['transfer', 'transaction', 'send', 'money', 'payment', 'failed', 'stuck'],
-        'App Performance': ['slow', 'crash', 'lag', 'freeze', 'speed', 'loading', 'hang'],
-        'User Interface': ['interface', 'ui', 'design', 'layout', 'button', 'menu', 'navigation'],
-        'Customer Support': ['support', 'help', 'response', 'service', 'contact', 'complaint', 'assistance'],
-        'Features': ['feature', 'missing', 'request', 'functionality', 'update', 'version', 'option']
-    }
+# Extract keywords for many rows with nlp.pipe, yielding (key, keywords) in input order
+def extract_keywords_batch(rows, pos_tags=['NOUN', 'ADJ', 'VERB'], batch_size=1000, n_process=1):
+    texts = ((text if isinstance(text, str) else '', key) for key, text in rows)
+    for doc, key in get_keyword_nlp().pipe(texts, as_tuples=True, batch_size=batch_size, n_process=n_process):
+        yield key, [
+            token.lemma_.lower() for token in doc
+            if token.pos_ in pos_tags and not token.is_stop and token.is_alpha and len(token) > 2
+        ]
+
+# Compiled theme lookup: keyword -> theme ids hash index plus a token n-gram index for phrases.
+# Single-word terms match extracted keyword lemmas; multi-word terms match consecutive
+# words of the lowercased review text, so phrases like "otp not received" keep their stopwords.
+class ThemeMatcher:
+    def __init__(self, theme_mapping):
+        self.themes = list(theme_mapping)
+        self.keyword_index = {}
+        self.phrase_index = {}
+        for theme_id, terms in enumerate(theme_mapping.values()):
+            for term in terms:
+                words = tuple(term.lower().split())
+                index = self.phrase_index if len(words) > 1 else self.keyword_index
+                key = words if len(words) > 1 else words[0]
+                index.setdefault(key, set()).add(theme_id)
+        self.phrase_lengths = sorted({len(phrase) for phrase in self.phrase_index})
+        self.counts = Counter()
+
+    def match_ids(self, keywords, tokens=()):
+        """Return matched theme ids in config order and update per-theme counts"""
+        matched = set()
+        for word in keywords:
+            matched.update(self.keyword_index.get(word, ()))
+        for n in self.phrase_lengths:
+            for start in range(len(tokens) - n + 1):
+                matched.update(self.phrase_index.get(tuple(tokens[start:start + n]), ()))
+        theme_ids = sorted(matched)
+        self.counts.update(self.themes[theme_id] for theme_id in theme_ids)
+        return theme_ids
+
+    def match(self, keywords, tokens=()):
+        """Return matched theme names in config order and update per-theme counts"""
+        return [self.themes[theme_id] for theme_id in self.match_ids(keywords, tokens)]
+
+    def match_counts(self):
+        return {theme: self.counts[theme] for theme in self.themes}
+
+# Build the matcher once per config file and reuse it across calls
+@lru_cache(maxsize=None)
+def load_theme_matcher(path=THEMES_CONFIG):
+    with open(path, encoding='utf-8') as f:
+        return ThemeMatcher(json.load(f))
+
+# Perform thematic analysis into a normalized pair of frames:
+# one row per review, plus a review_id -> theme mapping with categorical themes
+def analyze_themes_normalized(df, batch_size=1000, n_process=1, matcher=None, store=None):
+    matcher = matcher or load_theme_matcher()
+    categories = matcher.themes + [OTHER_THEME]
+    other_id = len(matcher.themes)
 
     df = df.copy()
     df['cleaned_review'] = df['cleaned_review'].fillna('').astype(str)
+    review_texts = df['review'].fillna('').astype(str) if 'review' in df.columns else pd.Series('', index=df.index)
 
-    for idx, row in df.iterrows():
-        try:
-            keywords = extract_keywords(row['cleaned_review'])
-            matched_themes = {
-                theme for theme, keywords_list in theme_mapping.items()
-                if any(word in keywords_list for word in keywords)
-            }
-            if not matched_themes:
-                matched_themes.add('Other')
-
-            for theme in matched_themes:
-                themes['bank'].append(row['bank'])
-                themes['review_id'].append(idx)
-                themes['theme'].append(theme)
-                themes['keywords'].append(', '.join(keywords))
-                themes['sentiment'].append(row.get('sentiment', 'UNKNOWN'))
-                themes['review_text'].append(row.get('review', ''))
-                themes['sentiment_label'].append(row.get('sentiment_label', ''))
-                themes['sentiment_score'].append(row.get('sentiment_score', ''))
+    if store is not None:
+        keyword_rows = enumerate(store.lookup(df['cleaned_review'], batch_size=batch_size, n_process=n_process))
+    else:
+        keyword_rows = extract_keywords_batch(
+            enumerate(df['cleaned_review']), batch_size=batch_size, n_process=n_process
+        )
 
+    keywords_joined = [None] * len(df)
+    theme_ids = [()] * len(df)
+    for (position, keywords), idx, text in zip(keyword_rows, df.index, review_texts):
+        try:
+            keywords_joined[position] = ', '.join(keywords)
+            tokens = WORD_PATTERN.findall(text.lower()) if matcher.phrase_index else ()
+            theme_ids[position] = matcher.match_ids(keywords, tokens) or (other_id,)
         except Exception as e:
             logger.error(f"Error processing review ID {idx}: {str(e)}")
-            continue
 
-    return pd.DataFrame(themes)
+    reviews = pd.DataFrame({'review_id': df.index, 'keywords': keywords_joined})
+    for output, (column, default) in REVIEW_COLUMNS.items():
+        reviews[output] = df[column].to_numpy() if column in df.columns else default
+
+    # Flatten the per-review theme ids into two aligned integer arrays
+    counts = np.fromiter((len(ids) for ids in theme_ids), dtype=np.int64, count=len(theme_ids))
+    codes = np.fromiter(chain.from_iterable(theme_ids), dtype=np.int16, count=int(counts.sum()))
+    review_themes = pd.DataFrame({
+        'review_id': np.repeat(df.index.to_numpy(), counts),
+        'theme': pd.Categorical.from_codes(codes, categories=categories)
+    })
+
+    return reviews, review_themes
+
+# Join the normalized frames back into the wide one-row-per-theme layout
+def widen_themes(reviews, review_themes):
+    wide = review_themes.merge(reviews, on='review_id', how='left', sort=False)
+    wide['theme'] = wide['theme'].astype(str)
+    return wide[WIDE_COLUMNS]
+
+# Perform thematic analysis, returning the wide one-row-per-theme frame
+def analyze_themes(df, batch_size=1000, n_process=1, matcher=None, store=None):
+    reviews, review_themes = analyze_themes_normalized(df, batch_size=batch_size, n_process=n_process,
+                                                       matcher=matcher, store=store)
+    return widen_themes(reviews, review_themes)
+
+# Write the normalized frames as typed Parquet and optionally the wide CSV
+def save_themes(reviews, review_themes, output_dir='data', export_csv=False):
+    reviews_path = os.path.join(output_dir, os.path.basename(THEME_REVIEWS_PATH))
+    mapping_path = os.path.join(output_dir, os.path.basename(THEME_MAP_PATH))
+    write_dataset(reviews, reviews_path)
+    write_dataset(review_themes, mapping_path)
+    logger.info(f"✅ Saved thematic analysis to {reviews_path} and {mapping_path}")
+
+    if export_csv:
+        csv_path = os.path.join(output_dir, 'bank_reviews_themes.csv')
+        widen_themes(reviews, review_themes).to_csv(csv_path, index=False)
+        logger.info(f"✅ Saved wide thematic export to {csv_path}")
+
+# Word cloud jobs per bank, drawn from precomputed word frequencies
+def word_cloud_jobs(df, text_column='cleaned_review'):
+    token_rows = (text.lower().split() for text in df[text_column].fillna('').astype(str))
+
+    stop_words = STOP_WORDS
+    frequencies = {}
+    for bank, tokens in zip(df['bank'], token_rows):
+        frequencies.setdefault(bank, Counter()).update(word for word in tokens if word not in stop_words)
+
+    return [
+        RenderJob(render_wordcloud, f'visualizations/wordcloud_{bank.lower().replace(" ", "_")}.png', {
+            'frequencies': dict(counts), 'title': f'Word Cloud for {bank}',
+            'dpi': 300, 'bbox_inches': 'tight', 'title_pad': 20
+        })
+        for bank, counts in frequencies.items() if counts
+    ]
+
+# Theme count bar chart jobs per bank
+def bar_chart_jobs(themes_df):
+    return [
+        RenderJob(render_count_bar, f'visualizations/themes_bar_{bank.lower().replace(" ", "_")}.png', {
+            'counts': [(theme, int(count)) for theme, count in bank_data['theme'].value_counts().items()],
+            'title': f'Theme Distribution for {bank}'
+        })
+        for bank, bank_data in themes_df.groupby('bank', sort=False)
+    ]
 
 # Generate word clouds per bank
 def generate_word_clouds(df, text_column='cleaned_review'):
-    for bank in df['bank'].unique():
-        try:
-            text = ' '.join(df[df['bank'] == bank][text_column].astype(str))
-            if not text.strip():
-                continue
-            wordcloud = WordCloud(
-                width=800, height=400, background_color='white',
-                stopwords=set(nlp.Defaults.stop_words), collocations=False
-            ).generate(text)
-
-            plt.figure(figsize=(10, 5))
-            plt.imshow(wordcloud, interpolation='bilinear')
-            plt.title(f'Word Cloud for {bank}', pad=20)
-            plt.axis('off')
-            plt.savefig(f'visualizations/wordcloud_{bank.lower().replace(" ", "_")}.png', dpi=300, bbox_inches='tight')
-            plt.close()
-        except Exception as e:
-            logger.error(f"Word cloud failed for {bank}: {str(e)}")
+    return render_jobs(word_cloud_jobs(df, text_column))
 
 # Plot bar charts per bank
 def generate_bar_charts(themes_df):
-    for bank in themes_df['bank'].unique():
-        try:
-            bank_data = themes_df[themes_df['bank'] == bank]
-            plt.figure(figsize=(10, 5))
-            sns.countplot(data=bank_data, y='theme', order=bank_data['theme'].value_counts().index)
-            plt.title(f'Theme Distribution for {bank}')
-            plt.tight_layout()
-            plt.savefig(f'visualizations/themes_bar_{bank.lower().replace(" ", "_")}.png')
-            plt.close()
-        except Exception as e:
-            logger.error(f"Bar plot failed for {bank}: {str(e)}")
+    return render_jobs(bar_chart_jobs(themes_df))
 
 # Main execution
 def main():
@@ -119,21 +223,27 @@ def main():
         os.makedirs('visualizations', exist_ok=True)
 
         logger.info("📥 Loading data...")
-        df = pd.read_csv('data/bank_reviews_with_sentiment.csv')
+        df = read_dataset(SENTIMENT_PATH)
 
         if 'cleaned_review' not in df.columns:
             df['cleaned_review'] = df['review'].fillna('').astype(str)
 
         logger.info("🔍 Performing thematic analysis...")
-        themes_df = analyze_themes(df)
-        themes_df.to_csv('data/bank_reviews_themes.csv', index=False)
-        logger.info("✅ Saved thematic analysis to data/bank_reviews_themes.csv")
+        # Reuse keywords stored by earlier runs; only new reviews go through spaCy
+        store = TokenStore(extract=extract_keywords_batch)
+        reviews, review_themes = analyze_themes_normalized(df, n_process=THEMES_WORKERS, store=store)
+        store.save()
+        logger.info(f"Token store stats: {store.stats()}")
+        # Pass --csv to also write the wide one-row-per-theme CSV
+        save_themes(reviews, review_themes, export_csv='--csv' in sys.argv)
 
-        logger.info("🌥️ Generating word clouds...")
-        generate_word_clouds(df)
+        # Bank and theme are all the charts and distribution need
+        themes_df = review_themes.merge(reviews[['review_id', 'bank']], on='review_id', how='left')
+        themes_df['theme'] = themes_df['theme'].astype(str)
 
-        logger.info("📊 Generating bar charts...")
-        generate_bar_charts(themes_df)
+        # Unchanged figures are skipped; the rest render together in a process pool
+        logger.info("🌥️📊 Generating word clouds and bar charts...")
+        render_jobs(word_cloud_jobs(df) + bar_chart_jobs(themes_df))
 
         logger.info("📈 Saving per-bank theme distribution...")
         per_bank_theme = themes_df.groupby(['bank', 'theme']).size().unstack(fill_value=0)
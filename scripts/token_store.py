@@ -0,0 +1,79 @@
+import os
+import time
+import uuid
+import hashlib
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TOKEN_STORE_PATH = 'data/token_store'
+# Fixed per part: inferred types make an all-empty keywords column list<null>, which later parts cannot read into
+STORE_SCHEMA = pa.schema([('text_key', pa.string()), ('keywords', pa.list_(pa.string()))])
+
+class TokenStore:
+    """
+    Per-review keyword lemmas persisted as Parquet parts keyed by text hash. Whitespace tokens
+    are not stored: they are a plain split of the text, cheaper to recompute than to read.
+    Each lookup reads only the stored rows for its own keys, so the store is never held in memory
+    whole. Importing this module does not load spaCy: keyword extraction is imported on the first
+    lookup that misses, unless an extract function is passed in.
+    """
+
+    def __init__(self, path=TOKEN_STORE_PATH, extract=None):
+        self.path = path
+        self.extract = extract
+        self.pending = {}
+        self.loaded = 0
+
+    @staticmethod
+    def make_key(text):
+        return f"en_core_web_sm:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def read(self, keys):
+        """Stored keywords for the given keys, through a filtered read of the Parquet parts"""
+        if not keys or not os.path.isdir(self.path):
+            return {}
+        if not any(name.endswith('.parquet') for name in os.listdir(self.path)):
+            return {}
+        stored = pd.read_parquet(self.path, columns=['text_key', 'keywords'], filters=[('text_key', 'in', list(keys))])
+        self.loaded += len(stored)
+        return dict(zip(stored['text_key'], stored['keywords'].map(list)))
+
+    def lookup(self, texts, batch_size=1000, n_process=1):
+        """Return keywords per text, running spaCy only on texts not stored yet"""
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        keys = [self.make_key(text) for text in texts]
+        entries = {key: self.pending[key] for key in keys if key in self.pending}
+        entries.update(self.read({key for key in keys if key not in entries}))
+        missing = {key: text for key, text in zip(keys, texts) if key not in entries}
+
+        if missing:
+            if self.extract is None:
+                from thematic_analysis import extract_keywords_batch
+                self.extract = extract_keywords_batch
+            for key, keywords in self.extract(missing.items(), batch_size=batch_size, n_process=n_process):
+                entries[key] = self.pending[key] = keywords
+
+        return [entries[key] for key in keys]
+
+    def save(self):
+        """Write entries added since the last save as a new Parquet part"""
+        if not self.pending:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        part = pa.Table.from_pydict({
+            'text_key': list(self.pending),
+            'keywords': list(self.pending.values())
+        }, schema=STORE_SCHEMA)
+        part_path = os.path.join(self.path, f"part-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet")
+        pq.write_table(part, part_path)
+        logger.info(f"Added {part.num_rows} reviews to token store {self.path}")
+        self.pending = {}
+
+    def stats(self):
+        return {'loaded': self.loaded, 'unsaved': len(self.pending)}
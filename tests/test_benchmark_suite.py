@@ -0,0 +1,18 @@
+import time
+
+from benchmark_suite import find_regressions, measure_stage, sample_peak_rss
+
+def allocate(size_mb):
+    block = bytearray(size_mb * 2**20)
+    time.sleep(0.2)
+    del block
+
+def test_peak_covers_memory_freed_before_return():
+    _, peak, rss_before = sample_peak_rss(allocate, 200)
+    assert peak - rss_before > 150
+
+def test_measure_stage_does_not_regress_against_itself():
+    stats = measure_stage('insert', 2000)
+    assert stats['rows'] == 2000 and stats['rows_per_sec'] > 0
+    assert stats['peak_rss_mb'] >= stats['stage_rss_mb']
+    assert find_regressions({'insert': {'2000': stats}}, {'insert': {'2000': dict(stats)}}) == []
@@ -0,0 +1,101 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import data_insertion
+from benchmark_suite import BANKS, generate_reviews
+from data_insertion import (backfill_review_hashes, build_review_rows, compute_review_hashes, execute_batch,
+                            insert_new_reviews, insert_reviews, review_hash, review_insert_sql)
+from database_setup import migrate
+
+@pytest.fixture
+def connection():
+    connection = sqlite3.connect(':memory:')
+    migrate(connection)
+    yield connection
+    connection.close()
+
+@pytest.fixture
+def bank_id_map():
+    return {bank: bank_id for bank_id, bank in enumerate(BANKS, start=1)}
+
+def count_reviews(connection):
+    return connection.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+def test_insert_reviews_loads_every_valid_row(connection, bank_id_map):
+    df = generate_reviews(500)
+    df = df[~compute_review_hashes(df).duplicated()]
+    df.loc[df.index[0], 'rating'] = None
+    df.loc[df.index[1], 'bank'] = 'Unknown Bank'
+
+    inserted = insert_reviews(connection, df, bank_id_map)
+
+    assert inserted == len(df) - 2
+    assert count_reviews(connection) == len(df) - 2
+
+def test_insert_new_reviews_skips_duplicates(connection, bank_id_map):
+    df = generate_reviews(500)
+    unique = int((~compute_review_hashes(df).duplicated()).sum())
+    repeated = pd.concat([df, df.head(50)], ignore_index=True)
+
+    assert insert_new_reviews(connection, repeated, bank_id_map) == unique
+    assert insert_new_reviews(connection, df, bank_id_map) == 0
+    assert count_reviews(connection) == unique
+
+
+def test_backfill_merges_legacy_duplicates():
+    connection = sqlite3.connect(':memory:')
+    connection.executescript("""
+        CREATE TABLE banks (bank_id INTEGER PRIMARY KEY, bank_name TEXT NOT NULL,
+                            app_name TEXT, play_store_url TEXT);
+        CREATE TABLE reviews (review_id INTEGER PRIMARY KEY, bank_id INTEGER REFERENCES banks(bank_id),
+                              review_text TEXT NOT NULL, cleaned_review TEXT, rating INTEGER NOT NULL,
+                              review_date TEXT NOT NULL, source TEXT, sentiment TEXT, sentiment_score REAL);
+        CREATE TABLE themes (theme_id INTEGER PRIMARY KEY, review_id INTEGER REFERENCES reviews(review_id),
+                             theme_name TEXT NOT NULL, keywords TEXT);
+        INSERT INTO banks (bank_id, bank_name) VALUES (1, 'Dashen Bank');
+        INSERT INTO reviews (review_id, bank_id, review_text, rating, review_date) VALUES
+            (1, 1, 'great app', 5, '2024-01-01'),
+            (2, 1, 'great app', 5, '2024-01-01'),
+            (3, 1, 'slow login', 2, '2024-01-02');
+        INSERT INTO themes (review_id, theme_name) VALUES (2, 'User Experience');
+    """)
+    migrate(connection)
+
+    assert backfill_review_hashes(connection) == 2
+    assert backfill_review_hashes(connection) == 0
+    cursor = connection.cursor()
+    cursor.execute("SELECT review_id, review_hash FROM reviews ORDER BY review_id")
+    assert cursor.fetchall() == [(1, review_hash('Dashen Bank', '2024-01-01', 'great app')),
+                                 (3, review_hash('Dashen Bank', '2024-01-02', 'slow login'))]
+    cursor.execute("SELECT review_id FROM themes")
+    assert cursor.fetchall() == [(1,)]
+
+
+def test_loading_leaves_the_load_marker_alone(connection, bank_id_map, monkeypatch):
+    touched = []
+    monkeypatch.setattr(data_insertion, 'mark_load_complete', lambda *args: touched.append(args))
+
+    insert_reviews(connection, generate_reviews(50), bank_id_map)
+    data_insertion.load_analysis(connection, generate_reviews(50))
+    assert touched == []
+
+
+def test_batches_stay_in_the_callers_transaction(connection, bank_id_map):
+    df = generate_reviews(10).drop_duplicates('review')
+    rows = build_review_rows(df, bank_id_map, df['rating'])
+    execute_batch(connection.cursor(), review_insert_sql('sqlite3'), rows)
+    assert connection.in_transaction
+    connection.rollback()
+    assert count_reviews(connection) == 0
+
+
+@pytest.mark.parametrize('argv', [['data_insertion.py'], ['data_insertion.py', '--analysis']])
+def test_missing_input_fails_the_stage(tmp_path, monkeypatch, argv):
+    monkeypatch.setattr(data_insertion, 'DATA_FILE_PATH', str(tmp_path / 'missing.parquet'))
+    monkeypatch.setattr(data_insertion, 'SENTIMENT_PATH', str(tmp_path / 'missing.parquet'))
+    monkeypatch.setattr('sys.argv', argv)
+    with pytest.raises(SystemExit) as exit_info:
+        data_insertion.main()
+    assert exit_info.value.code == 1
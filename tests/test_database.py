@@ -0,0 +1,35 @@
+import sqlite3
+
+from database import SQLitePool, get_bank_ids, set_pool
+from database_setup import migrate
+
+def banks_db(path, existing=()):
+    connection = sqlite3.connect(str(path))
+    migrate(connection)
+    connection.executemany("INSERT INTO banks (bank_name) VALUES (?)", [(name,) for name in existing])
+    connection.commit()
+    return connection
+
+def test_bank_ids_are_cached_per_database(tmp_path):
+    first = banks_db(tmp_path / 'first.db')
+    second = banks_db(tmp_path / 'second.db', existing=['Bank of Abyssinia'])
+
+    assert get_bank_ids(first, ['Dashen Bank']) == {'Dashen Bank': 1}
+    assert get_bank_ids(second, ['Dashen Bank']) == {'Dashen Bank': 2}
+    assert get_bank_ids(first, ['Dashen Bank']) == {'Dashen Bank': 1}
+
+def test_set_pool_forgets_cached_bank_ids(tmp_path):
+    path = tmp_path / 'reviews.db'
+    connection = banks_db(path)
+    assert get_bank_ids(connection, ['Dashen Bank']) == {'Dashen Bank': 1}
+    connection.execute("DELETE FROM banks")
+    connection.execute("INSERT INTO banks (bank_id, bank_name) VALUES (7, 'Dashen Bank')")
+    connection.commit()
+
+    pool = SQLitePool(str(path))
+    previous = set_pool(pool)
+    try:
+        assert get_bank_ids(connection, ['Dashen Bank']) == {'Dashen Bank': 7}
+    finally:
+        set_pool(previous)
+        pool.close()
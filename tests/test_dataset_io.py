@@ -0,0 +1,15 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dataset_io import DatasetWriter, read_dataset
+
+def test_column_all_null_in_first_chunk_takes_later_values(tmp_path):
+    path = str(tmp_path / 'reviews.parquet')
+    with DatasetWriter(path) as writer:
+        writer.write(pd.DataFrame({'review': ['ok'], 'rating': [5], 'reply': [None]}))
+        writer.write(pd.DataFrame({'review': ['slow'], 'rating': [1], 'reply': ['Sorry about that']}))
+
+    df = read_dataset(path)
+    assert df['reply'].isna().tolist() == [True, False] and df['reply'].iloc[1] == 'Sorry about that'
+    assert pq.read_schema(path).field('rating').type == pa.int8()
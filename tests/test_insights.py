@@ -0,0 +1,25 @@
+import importlib
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('matplotlib')
+pytest.importorskip('seaborn')
+pytest.importorskip('wordcloud')
+
+@pytest.fixture
+def insights(tmp_path, monkeypatch):
+    # insights creates ../reports/visuals relative to the working directory on import
+    (tmp_path / 'scripts').mkdir()
+    monkeypatch.chdir(tmp_path / 'scripts')
+    return importlib.import_module('insights')
+
+def test_missing_ratings_are_ignored(insights):
+    df = pd.DataFrame({
+        'bank': ['CBE', 'CBE', 'CBE'],
+        'rating': pd.array([5, None, 1], dtype='Int8'),
+        'cleaned_review': ['great transfer', 'crash crash', 'slow login']
+    })
+    summary = insights.summarize_banks(df, ['CBE'])['CBE']
+    assert summary['positive_frequencies'] == {'great': 1, 'transfer': 1}
+    assert summary['negative_frequencies'] == {'slow': 1, 'login': 1}
@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+
+nltk = pytest.importorskip('nltk')
+try:
+    nltk.data.find('corpora/stopwords')
+    nltk.data.find('tokenizers/punkt_tab')
+except LookupError:
+    pytest.skip("NLTK stopwords/punkt data not installed", allow_module_level=True)
+
+from benchmark_suite import generate_reviews
+from preprocess_reviews import clean_text, clean_texts
+
+def test_clean_texts_matches_clean_text():
+    reviews = generate_reviews(2000)['review']
+    reviews = pd.concat([reviews, pd.Series([None, 42, '', 'I cannot login!!', 'Wanna  FIX this??'])],
+                        ignore_index=True)
+
+    expected = reviews.apply(clean_text)
+    actual = clean_texts(reviews)
+
+    assert actual.tolist() == expected.tolist()
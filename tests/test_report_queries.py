@@ -0,0 +1,21 @@
+import sqlite3
+
+from database_setup import migrate
+from report_queries import QueryCache, rating_counts
+
+def reviews_db(ratings):
+    connection = sqlite3.connect(':memory:')
+    migrate(connection)
+    connection.execute("INSERT INTO banks (bank_id, bank_name) VALUES (1, 'Dashen Bank')")
+    connection.executemany("INSERT INTO reviews (bank_id, review_text, rating, review_date) VALUES (1, 'ok', ?, '2024-01-01')",
+                           [(rating,) for rating in ratings])
+    return connection
+
+def test_cache_is_keyed_by_database(tmp_path):
+    cache = QueryCache(ttl=60, marker_path=str(tmp_path / '.last_load'))
+    first, second = reviews_db([5, 5]), reviews_db([1])
+
+    assert rating_counts(first, cache).values.tolist() == [[5, 2]]
+    assert rating_counts(second, cache).values.tolist() == [[1, 1]]
+    assert rating_counts(first, cache).values.tolist() == [[5, 2]]
+    assert cache.stats() == {'entries': 2, 'hits': 1, 'misses': 2}
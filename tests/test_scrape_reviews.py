@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+pytest.importorskip('google_play_scraper')
+
+from benchmark_suite import VOCABULARY
+
+def stub_reviews(app_id, lang='en', country='et', sort=None, count=200, continuation_token=None, total=450):
+    """Offline stand-in for google_play_scraper.reviews: newest-first pages and an offset token"""
+    rng = random.Random(app_id)
+    listing = [{
+        'reviewId': f"{app_id}-{total - i}",
+        'content': ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(1, 30))),
+        'score': rng.randint(1, 5),
+        'at': f"2024-{12 - i * 12 // total:02d}-01 00:00:00"
+    } for i in range(total)]
+    start = continuation_token or 0
+    end = start + count
+    return listing[start:end], (end if end < total else None)
+
+@pytest.fixture
+def scrape_reviews(tmp_path, monkeypatch):
+    # The module creates ./data on import
+    monkeypatch.chdir(tmp_path)
+    import scrape_reviews
+    return scrape_reviews
+
+def test_concurrent_scrape_matches_serial(scrape_reviews):
+    apps = {f"Bank {i}": f"com.example.bank{i}" for i in range(6)}
+    serial, concurrent = scrape_reviews.ReviewSink(), scrape_reviews.ReviewSink()
+
+    serial_results = scrape_reviews.scrape_apps(apps, concurrency=1, rate=1000, fetch=stub_reviews, sink=serial)
+    results = scrape_reviews.scrape_apps(apps, concurrency=4, rate=1000, fetch=stub_reviews, sink=concurrent)
+
+    def by_bank(rows):
+        return {bank: [row for row in rows if row['bank'] == bank] for bank in apps}
+
+    assert by_bank(serial.rows) == by_bank(concurrent.rows)
+    assert results == serial_results
+    assert all(written > 300 for written in results.values())
+
+def test_sink_drops_reviews_already_written(scrape_reviews):
+    apps = {"Bank A": "com.example.a"}
+    sink = scrape_reviews.ReviewSink()
+
+    first = scrape_reviews.scrape_apps(apps, concurrency=1, rate=1000, fetch=stub_reviews, sink=sink)
+    again = scrape_reviews.scrape_apps(apps, concurrency=1, rate=1000, fetch=stub_reviews, sink=sink)
+
+    assert again == {"Bank A": 0}
+    assert len(sink.rows) == first["Bank A"]
+
+def test_run_interrupted_before_any_app_finishes_keeps_its_pages(scrape_reviews, tmp_path, monkeypatch):
+    (tmp_path / 'data').mkdir(exist_ok=True)
+    apps = {"Bank A": "com.example.a"}
+    scrape_apps = scrape_reviews.scrape_apps
+    monkeypatch.setattr('sys.argv', ['scrape_reviews.py'])
+    monkeypatch.setattr(scrape_reviews, 'load_apps', lambda: apps)
+
+    def interrupted(apps, sink=None, **kwargs):
+        sink.write([{'review': 'first page', 'rating': 5, 'date': '2024-01-01', 'bank': 'Bank A',
+                     'source': 'Google Play'}])
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(scrape_reviews, 'scrape_apps', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        scrape_reviews.main()
+
+    monkeypatch.setattr(scrape_reviews, 'scrape_apps',
+                        lambda apps, **kwargs: scrape_apps(apps, rate=1000, fetch=stub_reviews, **kwargs))
+    scrape_reviews.main()
+
+    with open(scrape_reviews.RAW_JSONL_PATH, encoding='utf-8') as f:
+        assert 'first page' in f.readline()
+    assert not (tmp_path / scrape_reviews.SCRAPE_PROGRESS_PATH).exists()
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from token_store import TokenStore
+
+def fake_extract(rows, batch_size=1000, n_process=1):
+    for key, text in rows:
+        yield key, [word for word in text.lower().split() if len(word) > 2]
+
+def test_import_does_not_load_spacy():
+    assert 'spacy' not in sys.modules
+
+def test_saved_entries_are_reused(tmp_path):
+    path = str(tmp_path / 'store')
+    store = TokenStore(path, extract=fake_extract)
+    assert store.lookup(['App keeps crashing', None]) == [['app', 'keeps', 'crashing'], []]
+    store.save()
+
+    def fail(rows, batch_size=1000, n_process=1):
+        raise AssertionError("stored text was extracted again")
+        yield
+
+    reloaded = TokenStore(path, extract=fail)
+    assert reloaded.stats() == {'loaded': 0, 'unsaved': 0}
+    assert reloaded.lookup(['App keeps crashing']) == [['app', 'keeps', 'crashing']]
+    assert reloaded.stats() == {'loaded': 1, 'unsaved': 0}
+
+def test_part_without_keywords_does_not_break_later_reads(tmp_path):
+    path = str(tmp_path / 'store')
+    first = TokenStore(path, extract=fake_extract)
+    first.lookup(['', 'a b'])
+    first.save()
+    # Parts are read in name order; the all-empty part must not fix keywords to list<null>
+    for name in os.listdir(path):
+        assert pq.read_schema(os.path.join(path, name)).field('keywords').type == pa.list_(pa.string())
+    second = TokenStore(path, extract=fake_extract)
+    second.lookup(['crash login'])
+    second.save()
+
+    assert TokenStore(path, extract=fake_extract).lookup(['a b', 'crash login']) == [[], ['crash', 'login']]